@@ -1,20 +1,49 @@
 # agent_nodes.py
 
 import os, re, textwrap, subprocess, json, time
-from typing import List, Dict, Optional, TypedDict, Any
+from typing import List, Dict, Optional, TypedDict, Any, Union
 from openai import OpenAI
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
 
 # 로컬 모듈 임포트
-from utils import clean_text, split_sents, ffprobe_duration, img_to_data_url, render_mp4, concat_videos_ffmpeg, export_slide_as_png
+from slide_store import SlideStore, open_store, STORE_FILENAME
+from search_backends import get_search_backend
+from resilience import ResilientCaller
+from utils import clean_text, split_sents, ffprobe_duration, img_to_data_url, render_mp4, render_mp4s_from_stream, atempo_chain, concat_videos_ffmpeg, append_hls_segments, finalize_hls_playlist, export_slide_as_png
 
 # --- 환경 설정 ---
 LLM_MODEL = "gpt-4o-mini"
 TTS_MODEL = "tts-1" # TTS-1-HD가 더 고음질이나, tts-1이 더 빠르고 비용 효율적
-client = OpenAI()
+STREAM_TTS = True # True면 TTS 응답을 파일로 저장하지 않고 ffmpeg로 바로 흘려 슬라이드 영상까지 생성
+client = OpenAI(max_retries=0) # 재시도/timeout은 resilient 호출 계층에서 처리 (OPENAI_BASE_URL로 가짜 서버 지정 가능)
+resilient = ResilientCaller(
+    deadline_sec=float(os.getenv("OPENAI_DEADLINE_SEC", 180)),          # 재시도 포함 호출 1건의 최대 시간
+    attempt_timeout_sec=float(os.getenv("OPENAI_ATTEMPT_TIMEOUT_SEC", 60)) # 단일 시도 제한 시간
+)
+
+def render_tts_stream(voice: str, script: str, slide_img: str, outputs: List[dict]) -> List[Union[float, Exception]]:
+    """TTS 스트리밍 응답 수신과 ffmpeg 합성(render_mp4s_from_stream)을 하나의 재시도 단위로 실행
+
+    본문 수신 중 연결이 끊기거나 시간 초과되면 ffmpeg를 새로 띄워 처음부터 재시도하고, deadline은 본문 수신까지 적용한다.
+    같은 파일에 ffmpeg 두 개가 쓰지 않도록 hedging은 사용하지 않는다.
+    """
+    def _attempt(budget):
+        deadline = time.monotonic() + budget
+        with client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL, voice=voice, input=script, response_format="mp3",
+            timeout=min(resilient.attempt_timeout_sec, budget) # 읽기 1회 제한 (본문 전체는 deadline으로 제한)
+        ) as response:
+            return render_mp4s_from_stream(slide_img, response.iter_bytes(), outputs, deadline=deadline)
+    return resilient.call("tts_stream", _attempt, hedge=False)
 
 # --- State 정의 ---
+class Variant(TypedDict, total=False):
+  voice: str # voice_choices 항목 또는 TTS voice 이름
+  speed: float
+  width: int
+  height: int
+
 class State(TypedDict, total=False):
   pptx_path: str
   work_dir: str
@@ -22,26 +51,26 @@ class State(TypedDict, total=False):
   slide_index: int
   total_slides: int # 추가: 총 슬라이드 수
 
-  titles: List[str]
-  texts: List[str]
-  tables: List[List[List[str]]]
-  images: List[str]
-  shape_texts: List[str] # 도형 텍스트를 저장할 필드 추가
-  slide_image: List[str]
+  # 슬라이드별 텍스트/표/이미지/도형 텍스트/스냅샷/스크립트/영상/HLS 세그먼트는 SlideStore(store_path)에 저장
+  # (State에는 핸들만 두어 매 step마다 덱 전체가 복사되지 않도록 함)
+  store_path: str
+  titles: List[str] # 목차 구성에 전체가 필요하므로 State에 유지
   
   external_content: Dict[str, List[Dict[str, str]]]
 
   page_content: str
   script: str
-  all_scripts: List[str] # 누적 스크립트
   quiz_set: List[Dict[str, Any]]
   
   audio: str
-  video_path: List[str]
-  video_paths: List[str]
+  audio_duration: float # 스트리밍 합성 시 TTS mp3 프레임 헤더로 계산한 슬라이드 영상 길이(초, 속도 반영)
   final_video: str
+  hls_playlist: str # 점진적 재생용 HLS 재생목록 경로 (output_mode가 hls일 때)
   
-  failed_slides: List[int] # 실패한 슬라이드 인덱스 저장
+  failed_slides: List[int] # 실패한 슬라이드 번호 (node_concat에서 저장소의 failed 필드로 구성)
+
+  variants: List[Variant] # 멀티 변형 렌더링 요청 (voice/speed/해상도 조합)
+  variant_videos: List[Dict[str, Any]] # 변형별 결과 (final_video, failed_slides 포함)
 
 # ===============================
 # 🔹 Node Functions
@@ -71,20 +100,23 @@ def node_parse_all(state: State) -> State:
     os.makedirs(MEDIA_DIR, exist_ok=True)
     os.makedirs(SLIDES_DIR, exist_ok=True)
 
-    texts, tables, images, titles, slide_image, shapes = [], [], [], [], [], []
+    titles = []
+    store = SlideStore(os.path.join(work_dir, STORE_FILENAME))
 
     for slide_idx, slide in enumerate(ppt.slides):
         # 1. 슬라이드 이미지(스냅샷) 추출
-        slide_state = {"pptx_path": state['pptx_path'], "work_dir": SLIDES_DIR, "slide_index": slide_idx}
+        # PDF는 덱당 1회만 변환하고 마지막 슬라이드를 추출한 뒤 삭제
+        slide_state = {"pptx_path": state['pptx_path'], "work_dir": SLIDES_DIR, "slide_index": slide_idx,
+                       "keep_pdf": slide_idx < len(ppt.slides) - 1}
         slide_state = export_slide_as_png(slide_state)
         
         src_path = slide_state["slide_image"]
         dst_path = os.path.join(SLIDES_DIR, f"slide_img{slide_idx+1}.png")
         if os.path.exists(src_path):
             os.replace(src_path, dst_path) # 파일 이동
-            slide_image.append(dst_path)
+            slide_image = dst_path
         else:
-            slide_image.append(None)
+            slide_image = None
 
         # 2. 텍스트, 표, 이미지 정보 추출
         full_slide_text, slide_tables, slide_images, slide_title, slide_shapes_texts = "", [], [], "", []
@@ -111,64 +143,35 @@ def node_parse_all(state: State) -> State:
                 with open(path, "wb") as f:
                     f.write(sh.image.blob)
 
-        # 3. 결과 누적
-        texts.append(clean_text(full_slide_text))
-        tables.append(slide_tables)
-        images.append(slide_images)
+        # 3. 슬라이드별 결과는 저장소에 기록 (State에는 제목만 누적)
+        store.put_many(slide_idx, {
+            "text": clean_text(full_slide_text),
+            "tables": slide_tables,
+            "images": slide_images,
+            "slide_image": slide_image,
+            "shape_text": ",".join(slide_shapes_texts)
+        })
         titles.append(slide_title)
-        shapes.append(",".join(slide_shapes_texts))
+
+    store.close()
 
     # 4. State 저장
     state.update({
-        'texts': texts,
-        'tables': tables,
-        'images': images,
-        'slide_image': slide_image,
+        "store_path": store.path,
         'titles': titles,
-        'shape_texts': shapes,
         "total_slides": len(ppt.slides)
     })
     
     return state
 
-def serpapi_search_by_title(title: str, num: int = 4) -> list[dict]:
-    """SerpAPI를 이용해 실제 검색을 수행하고 필터링된 결과를 반환"""
-    key = os.getenv("SERPAPI_API_KEY")
-    EXCLUDE_DOMAINS = ["blog.naver.com", "tistory.com", "brunch.co.kr", "medium.com", "velog.io", "kin.naver.com", "reddit.com", "youtube.com"]
-    query = f"{title} " + " ".join([f"-site:{d}" for d in EXCLUDE_DOMAINS])
-    
-    try:
-        res = requests.get("https://serpapi.com/search.json", params={
-            "engine": "google", "q": query, "hl": "ko", "gl": "kr", "num": num, "api_key": key
-        }, timeout=15)
-        
-        data = res.json().get("organic_results", []) or []
-        results = []
-        for item in data:
-            url = item.get("link", "")
-            if not url: continue
-            domain = urlparse(url).netloc
-            results.append({
-                "title": item.get("title", ""),
-                "url": url,
-                "snippet": item.get("snippet", ""),
-                "domain": domain
-            })
-        return results
-    except Exception as e:
-        print(f"[SerpAPI 오류] 검색 실패: {e}")
-        return []
-
 def node_tool_search(state: dict) -> dict:
-    """외부 검색 노드: 슬라이드 제목을 기반으로 검색을 수행하고 결과를 state에 저장"""
+    """외부 검색 노드: 슬라이드 제목을 기반으로 검색을 수행하고 결과를 state에 저장 (백엔드는 SEARCH_BACKEND 또는 prompt['search_backend'])"""
     idx = state.get("slide_index", 0)
     titles = state.get("titles", [])
-    texts_all = state.get("texts", [])
-    tables_all = state.get("tables", [])
-    images_all = state.get("images", [])
 
     title = titles[idx] if idx < len(titles) else ""
-    texts = texts_all[idx] if idx < len(texts_all) else ""
+    with open_store(state) as store:
+        texts = store.get(idx, "text", "") or ""
     
     state["external_content"] = {"queries": [], "summaries": [], "references": []} # 초기화
 
@@ -179,11 +182,13 @@ def node_tool_search(state: dict) -> dict:
     # ... (필요에 따라 table, image 쿼리 추가 로직)
     
     # 검색 수행
+    backend = get_search_backend(state.get("prompt", {}).get("search_backend"))
     all_results = []
     for q in queries:
-        results = serpapi_search_by_title(q["text"], num=4)
+        results = backend.search(q["text"], num=4)
         all_results.extend(results)
-        time.sleep(0.2)
+        if backend.query_interval_sec:
+            time.sleep(backend.query_interval_sec)
         
     # 결과 정리 (중복 제거 및 구조화)
     summaries = [{"text": clean_text(r["snippet"]), "source": r["title"]} for r in all_results if r.get("snippet")]
@@ -200,17 +205,17 @@ def node_generate_page_content(state: State) -> State:
     """LLM을 호출하여 현재 슬라이드 정보와 외부 자료를 통합하여 페이지 설명문 생성"""
     idx        = int(state.get("slide_index", 0))
     titles     = state.get("titles", [])
-    texts_all  = state.get("texts", [])
-    tables_all = state.get("tables", [])
-    images_all = state.get("images", [])
-    shapes_all = state.get("shape_texts", [])
     prompt     = clean_text(state.get("prompt", {}).get("style", "")) # style 프롬프트
 
+    # 현재 슬라이드 산출물만 저장소에서 로드
+    with open_store(state) as store:
+        slide = store.get_slide(idx)
+
     title  = clean_text(str(titles[idx])) if idx < len(titles) else ""
-    texts  = clean_text(str(texts_all[idx])) if idx < len(texts_all) else ""
-    tables = tables_all[idx] if idx < len(tables_all) else []
-    images = images_all[idx] if idx < len(images_all) else []
-    shapes = shapes_all[idx] if idx < len(shapes_all) else ""
+    texts  = clean_text(str(slide.get("text", "")))
+    tables = slide.get("tables") or []
+    images = slide.get("images") or []
+    shapes = slide.get("shape_text") or ""
 
     # 표 전처리
     table_text = ""
@@ -255,7 +260,8 @@ def node_generate_page_content(state: State) -> State:
     for img_url in image_data_urls:
         messages[-1]["content"].append({"type": "image_url", "image_url": {"url": img_url}})
 
-    response = client.chat.completions.create(model=LLM_MODEL, messages=messages, temperature=0.5)
+    response = resilient.call("page_content", lambda timeout: client.chat.completions.create(
+        model=LLM_MODEL, messages=messages, temperature=0.5, timeout=timeout))
 
     # 결과 저장
     page_content = clean_text(response.choices[0].message.content)
@@ -266,8 +272,6 @@ def node_generate_script(state: State) -> State:
     """강의 스크립트 생성: 이전 스크립트와 다음 목차를 고려하여 연속성 있게 작성"""
     
     all_titles = state.get("titles", [])
-    prev_scripts = state.get("all_scripts", [])
-    previous_script = prev_scripts[-1] if prev_scripts else "없음"
     
     prompt_data = state.get("prompt", {})
     tone = prompt_data.get("tone", "친절하고 명료한 강의 톤")
@@ -276,6 +280,10 @@ def node_generate_script(state: State) -> State:
 
     current_index = state.get("slide_index", 0)
     total_slides = state.get("total_slides", len(all_titles))
+
+    # 직전 슬라이드 스크립트만 저장소에서 로드
+    with open_store(state) as store:
+        previous_script = (store.get(current_index - 1, "script") if current_index > 0 else None) or "없음"
     current_title = all_titles[current_index] if all_titles and current_index < len(all_titles) else "현재 슬라이드"
     
     # --- 강의 흐름(Flow) 지시사항 구성 (가장 중요한 고도화 파트) ---
@@ -326,24 +334,33 @@ def node_generate_script(state: State) -> State:
     """
 
     # (3) LLM 호출
-    response = client.chat.completions.create(
-        model=LLM_MODEL, messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}], temperature=0.7
-    )
+    response = resilient.call("script", lambda timeout: client.chat.completions.create(
+        model=LLM_MODEL, messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}], temperature=0.7,
+        timeout=timeout
+    ))
 
     script = clean_text(response.choices[0].message.content).replace("[스크립트 시작]", "").replace("[스크립트 종료]", "")
     
-    # State 업데이트
+    # State 업데이트 (누적 스크립트는 저장소에 기록)
     state["script"] = script
-    if "all_scripts" not in state: state["all_scripts"] = []
-    state["all_scripts"].append(script)
+    with open_store(state) as store:
+        store.put(current_index, "script", script)
 
     return state
 
+def slide_video_path(work_dir: str, slide_index: int) -> str:
+    """슬라이드별 MP4 영상 경로"""
+    return os.path.join(work_dir, f"slide{slide_index+1}_lecture.mp4")
+
+def voice_name(voice: str) -> str:
+    """'교육·온라인 수업용 -alloy' 형태의 선택지에서 TTS voice 이름만 추출"""
+    return voice.split('-')[-1].strip()
+
 def node_tts(state: dict) -> dict:
-    """발표 스크립트를 음성(mp3)으로 변환하고 속도 조절"""
+    """발표 스크립트를 음성(mp3)으로 변환하고 속도 조절 (STREAM_TTS면 슬라이드 영상까지 바로 생성)"""
     script = state.get("script", "")
     prompt = state.get("prompt", {})
-    voice = prompt.get("voice", "alloy").split('-')[-1].strip()
+    voice = voice_name(prompt.get("voice", "alloy"))
     work_dir = state.get("work_dir", "./")
     speed = float(prompt.get("speed", 1.0))
     slide_idx = int(state.get("slide_index", 0))
@@ -351,37 +368,36 @@ def node_tts(state: dict) -> dict:
     if not script.strip(): raise ValueError("스크립트가 비어 있습니다.")
 
     os.makedirs(work_dir, exist_ok=True)
+
+    # 스트리밍 경로: TTS 바이트 스트림 → ffmpeg stdin (atempo + 이미지 합성) → 슬라이드 MP4
+    with open_store(state) as store:
+        slide_img = store.get(slide_idx, "slide_image")
+    if STREAM_TTS and slide_img and os.path.exists(slide_img):
+        out_mp4 = slide_video_path(work_dir, slide_idx)
+        duration = render_tts_stream(voice, script, slide_img, [{"out_mp4": out_mp4, "speed": speed}])[0]
+        if isinstance(duration, Exception):
+            raise duration
+
+        state["audio"] = ""
+        state["audio_duration"] = duration
+        with open_store(state) as store:
+            store.put(slide_idx, "video", out_mp4)
+        return state
+
     base_audio_path = os.path.join(work_dir, f"narration_raw_{slide_idx}.mp3")
     final_audio_path = os.path.join(work_dir, f"narration_{slide_idx}_{speed}x.mp3")
 
     # OpenAI TTS 호출
-    response = client.audio.speech.create(model=TTS_MODEL, voice=voice, input=script, response_format="mp3")
+    response = resilient.call("tts", lambda timeout: client.audio.speech.create(
+        model=TTS_MODEL, voice=voice, input=script, response_format="mp3", timeout=timeout))
     with open(base_audio_path, "wb") as f:
         f.write(response.read())
 
     # FFmpeg로 속도 조절
-    if speed != 1.0:
-        # ffmpeg atempo 필터는 0.5x ~ 100.0x만 지원 (0.5 이하/2.0 초과는 atempo 필터 체인 필요)
-        if speed > 2.0 or speed < 0.5: 
-            # 0.5~2.0 범위를 벗어나면, 여러 atempo를 체인으로 연결하여 처리
-            current_speed = speed
-            atempo_filters = []
-            while current_speed > 2.0:
-                atempo_filters.append("atempo=2.0")
-                current_speed /= 2.0
-            while current_speed < 0.5:
-                atempo_filters.append("atempo=0.5")
-                current_speed /= 0.5
-            if current_speed != 1.0:
-                 atempo_filters.append(f"atempo={current_speed}")
-            filter_chain = ",".join(atempo_filters)
-            
-        else:
-            filter_chain = f"atempo={speed}"
-
+    filter_chain = atempo_chain(speed)
+    if filter_chain:
         cmd = ["ffmpeg", "-y", "-i", base_audio_path, "-filter:a", filter_chain, "-b:a", "192k", final_audio_path]
         subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        
     else:
         final_audio_path = base_audio_path
 
@@ -391,47 +407,129 @@ def node_tts(state: dict) -> dict:
 
 def node_make_video(state: dict) -> dict:
     """슬라이드 이미지와 음성을 합쳐 슬라이드별 MP4 영상 생성"""
-    slide_imgs = state.get("slide_image", [])
     audio_path = state.get("audio", "")
     work_dir = state.get("work_dir", "./")
     slide_index = state.get("slide_index", 0)
 
-    if not slide_imgs or slide_index >= len(slide_imgs) or not os.path.exists(audio_path):
-        return state
+    out_mp4 = slide_video_path(work_dir, slide_index)
 
-    if "video_path" not in state: state["video_path"] = []
+    with open_store(state) as store:
+        # 스트리밍 TTS 단계에서 이미 생성된 경우 건너뜀
+        if store.get(slide_index, "video") == out_mp4 and os.path.exists(out_mp4):
+            return state
+        slide_img = store.get(slide_index, "slide_image")
 
-    video_filename = f"slide{slide_index+1}_lecture.mp4"
-    out_mp4 = os.path.join(work_dir, video_filename)
+    if not slide_img or not audio_path or not os.path.exists(audio_path):
+        return state
 
     # 실제 영상 생성
-    render_mp4(image_path=slide_imgs[slide_index], audio_path=audio_path, out_mp4=out_mp4)
-    
-    # 중복 방지하여 video_path에 추가
-    if out_mp4 not in state["video_path"]:
-        state["video_path"].append(out_mp4)
+    render_mp4(image_path=slide_img, audio_path=audio_path, out_mp4=out_mp4)
+
+    with open_store(state) as store:
+        store.put(slide_index, "video", out_mp4)
 
     return state
 
+def variant_label(variant: Variant) -> str:
+    """변형별 출력 디렉터리 이름 (예: alloy_1.2x_1280x720)"""
+    return (f"{voice_name(variant.get('voice', 'alloy'))}_{float(variant.get('speed', 1.0))}x_"
+            f"{int(variant.get('width', 1920))}x{int(variant.get('height', 1080))}")
+
+def node_render_variants(state: State) -> State:
+    """한 번 생성한 스크립트를 공유하여 voice/speed/해상도 조합별 영상을 생성 (같은 voice는 TTS 호출 1회를 공유)"""
+    variants = state.get("variants", [])
+    total_slides = int(state.get("total_slides", len(state.get("titles", []))))
+    work_dir = state.get("work_dir", "./")
+
+    if not variants:
+        state["variant_videos"] = []
+        return state
+
+    # voice별로 변형을 묶어, 슬라이드당 TTS 스트림 하나를 여러 ffmpeg에 동시에 흘려보냄
+    voice_groups: Dict[str, List[int]] = {}
+    for k, v in enumerate(variants):
+        voice_groups.setdefault(voice_name(v.get("voice", "alloy")), []).append(k)
+
+    variant_dirs = [os.path.join(work_dir, f"variant{k+1}_{variant_label(v)}") for k, v in enumerate(variants)]
+    for d in variant_dirs:
+        os.makedirs(d, exist_ok=True)
+    variant_slides = [[] for _ in variants]
+    variant_failed = [[] for _ in variants]
+
+    with open_store(state) as store:
+        for idx in range(total_slides):
+            # 슬라이드 하나씩만 로드
+            script = store.get(idx, "script") or ""
+            slide_img = store.get(idx, "slide_image")
+            if not script.strip() or not slide_img or not os.path.exists(slide_img):
+                for failed in variant_failed: failed.append(idx + 1)
+                continue
+
+            for voice, members in voice_groups.items():
+                outputs = [{"out_mp4": slide_video_path(variant_dirs[k], idx),
+                            "speed": float(variants[k].get("speed", 1.0)),
+                            "width": int(variants[k].get("width", 1920)),
+                            "height": int(variants[k].get("height", 1080))} for k in members]
+                try:
+                    results = render_tts_stream(voice, script, slide_img, outputs)
+                except Exception as e:
+                    # TTS 호출/스트림 실패: 같은 voice를 쓰는 변형 모두 이 슬라이드 실패
+                    print(f"[변형 렌더링 오류] 슬라이드 {idx+1}, voice={voice}: {e}")
+                    for k in members: variant_failed[k].append(idx + 1)
+                    continue
+                # ffmpeg 실패는 해당 변형만 실패 처리
+                for k, o, result in zip(members, outputs, results):
+                    if isinstance(result, Exception):
+                        print(f"[변형 렌더링 오류] 슬라이드 {idx+1}, {variant_label(variants[k])}: {result}")
+                        variant_failed[k].append(idx + 1)
+                    else:
+                        variant_slides[k].append(o["out_mp4"])
+
+    results = []
+    for k, v in enumerate(variants):
+        final_video = None
+        if variant_slides[k]:
+            final_video = os.path.join(variant_dirs[k], "final_lecture.mp4")
+            try:
+                concat_videos_ffmpeg(video_paths=variant_slides[k], out_path=final_video, reencode=False)
+            except subprocess.CalledProcessError as e:
+                # 병합 실패도 해당 변형만 결과 없음으로 처리
+                print(f"[변형 병합 오류] {variant_label(v)}: {e}")
+                final_video = None
+        results.append({**v, "final_video": final_video, "failed_slides": variant_failed[k]})
+
+    state["variant_videos"] = results
+    return state
+
+def output_mode(state: dict) -> str:
+    """출력 방식: 'mp4'(완료 후 병합) 또는 'hls'(슬라이드 완료 시마다 재생목록에 추가)"""
+    return state.get("prompt", {}).get("output_mode", "mp4").split('-')[-1].strip().lower()
+
+def publish_hls_segments(state: dict, video: str, slide_index: int, store: SlideStore):
+    """완성된 슬라이드 영상을 라이브 HLS 재생목록 끝에 추가하고 세그먼트 경로를 저장소에 기록"""
+    work_dir = state.get("work_dir", "./")
+    if not state.get("hls_playlist"):
+        state["hls_playlist"] = os.path.join(work_dir, "hls", "lecture.m3u8")
+
+    try:
+        segments = append_hls_segments(video, state["hls_playlist"], segment_prefix=f"slide{slide_index+1:04d}")
+        store.put(slide_index, "hls_segments", segments)
+    except Exception as e:
+        print(f"[HLS 오류] 슬라이드 {slide_index+1} 세그먼트 추가 실패: {e}")
+
 def node_accumulate_and_step(state: dict) -> dict:
     """영상 누적 및 다음 슬라이드 인덱스 증가"""
     current_idx = state.get("slide_index", 0)
-    total = state.get("total_slides", 1)
-    video_list = state.get("video_path", [])
-
-    # 누적 리스트 초기화
-    if "video_paths" not in state or not isinstance(state["video_paths"], list):
-        state["video_paths"] = []
-
-    # 1️⃣ 영상 검증 및 누적
-    if len(video_list) > current_idx:
-        current_video = video_list[current_idx]
-        if os.path.exists(current_video):
-            if current_video not in state["video_paths"]:
-                state["video_paths"].append(current_video)
-        else:
-            if "failed_slides" not in state: state["failed_slides"] = []
-            state["failed_slides"].append(current_idx + 1) # 1-based index
+
+    # 1️⃣ 영상 검증 (목록은 State에 누적하지 않고 node_concat에서 저장소로부터 구성)
+    with open_store(state) as store:
+        current_video = store.get(current_idx, "video")
+        if current_video:
+            if os.path.exists(current_video):
+                if output_mode(state) == "hls":
+                    publish_hls_segments(state, current_video, current_idx, store)
+            else:
+                store.put(current_idx, "failed", True)
     
     # 2️⃣ 다음 슬라이드로 이동
     state["slide_index"] = current_idx + 1
@@ -449,9 +547,22 @@ def router_continue_or_done(state: dict) -> str:
         return "continue"
 
 def node_concat(state: State) -> State:
-    """video_paths의 모든 영상을 순서대로 연결하여 최종 영상 생성"""
-    video_paths = state.get("video_paths", [])
+    """슬라이드 영상을 순서대로 연결하여 최종 영상 생성 (HLS 모드면 재생목록 마무리 후 선택적으로 MP4 생성)"""
     work_dir = state.get("work_dir", "./step1_output")
+    total_slides = state.get("total_slides", 0)
+
+    # 영상/실패 목록은 이 시점에만 저장소에서 한 번 구성
+    with open_store(state) as store:
+        videos = store.column("video", total_slides)
+        failed = store.column("failed", total_slides, default=False)
+    video_paths = [v for v, f in zip(videos, failed) if v and not f]
+    state["failed_slides"] = [i + 1 for i, f in enumerate(failed) if f] # 1-based index
+
+    if output_mode(state) == "hls":
+        if state.get("hls_playlist"):
+            finalize_hls_playlist(state["hls_playlist"])
+        if not state.get("prompt", {}).get("remux_mp4", True):
+            return state
 
     if not video_paths:
         return state
@@ -467,7 +578,9 @@ def node_concat(state: State) -> State:
 
 def node_generate_quiz(state: dict) -> dict:
     """강의 스크립트 전체를 바탕으로 복습 퀴즈를 JSON 형식으로 생성"""
-    all_scripts = state.get("all_scripts", [])
+    # 퀴즈는 강의 전체가 필요하므로 이 시점에만 전체 스크립트를 로드
+    with open_store(state) as store:
+        all_scripts = [s for s in store.column("script", state.get("total_slides", 0), default="") if s]
 
     if not all_scripts:
         state["quiz_set"] = []
@@ -499,10 +612,10 @@ def node_generate_quiz(state: dict) -> dict:
     """)
 
     try:
-        response = client.chat.completions.create(
+        response = resilient.call("quiz", lambda timeout: client.chat.completions.create(
             model=LLM_MODEL, messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-            response_format={"type": "json_object"}
-        )
+            response_format={"type": "json_object"}, timeout=timeout
+        ))
         quiz_set_data = json.loads(response.choices[0].message.content.strip())
         # LLM이 직접 배열을 반환하거나, "quizzes" 등의 키로 감쌀 수 있음.
         state["quiz_set"] = quiz_set_data.get("quizzes", quiz_set_data) 
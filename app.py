@@ -1,6 +1,6 @@
 # app.py
 
-import os, requests, time, shutil, re, textwrap, subprocess, json, base64, mimetypes
+import os, requests, time, shutil, re, textwrap, subprocess, json, base64, mimetypes, uuid, threading
 from pathlib import Path
 from typing import List, Dict, Optional, TypedDict, Any
 from openai import OpenAI
@@ -12,7 +12,11 @@ from difflib import SequenceMatcher
 
 # 🧩 NOTE: 실제 GitHub에 올릴 때는 이 파일을 포함한 모든 파일을 import 하도록 구조를 잡아야 합니다.
 # 현재는 Colab 환경에서 하나의 파일로 통합하여 실행하는 방식에 맞게 재구성했습니다.
-from agent_nodes import State, node_parse_all, node_tool_search, node_generate_page_content, node_generate_script, node_tts, node_make_video, node_accumulate_and_step, router_continue_or_done, node_concat, node_generate_quiz, LLM_MODEL, TTS_MODEL, client
+from pptx import Presentation
+from utils import peak_rss_mb
+from slide_store import open_store
+from office_pool import start_office_pool
+from agent_nodes import State, node_parse_all, node_tool_search, node_generate_page_content, node_generate_script, node_tts, node_make_video, node_render_variants, node_accumulate_and_step, router_continue_or_done, node_concat, node_generate_quiz, LLM_MODEL, TTS_MODEL, client, resilient
 
 # --- Graph Compilation ---
 builder = StateGraph(State)
@@ -43,17 +47,58 @@ builder.add_edge("make_quiz", END)
 
 app = builder.compile()
 
+# --- 멀티 변형 Graph: 파싱/검색/페이지 설명/스크립트는 1회만, 이후 변형별 TTS·영상·병합 ---
+variant_builder = StateGraph(State)
+variant_builder.add_node("parse_ppt", node_parse_all)
+variant_builder.add_node("tool_search", node_tool_search)
+variant_builder.add_node("gen_page_content", node_generate_page_content)
+variant_builder.add_node("gen_script", node_generate_script)
+variant_builder.add_node("accumulate", node_accumulate_and_step)
+variant_builder.add_node("render_variants", node_render_variants)
+variant_builder.add_node("make_quiz", node_generate_quiz)
+
+variant_builder.add_conditional_edges("accumulate", router_continue_or_done, {
+    "continue": "tool_search",
+    "done": "render_variants"
+})
+
+variant_builder.set_entry_point("parse_ppt")
+variant_builder.add_edge("parse_ppt", "tool_search")
+variant_builder.add_edge("tool_search", "gen_page_content")
+variant_builder.add_edge("gen_page_content", "gen_script")
+variant_builder.add_edge("gen_script", "accumulate")
+variant_builder.add_edge("render_variants", "make_quiz")
+variant_builder.add_edge("make_quiz", END)
+
+variant_app = variant_builder.compile()
+
 
 # --- Gradio Wrapper Functions ---
 
-def generate_state_and_run(pptx_file, tone, voice, style, target_duration_sec, speed):
-    # API Key 로딩 (Gradio 환경에서 재실행 방지)
-    # NOTE: GitHub에서는 이 부분이 환경 변수 설정으로 대체되어야 합니다.
-    if not os.getenv('OPENAI_API_KEY'):
-        return None, None, "API 키가 설정되지 않았습니다.", []
-        
+_metrics_lock = threading.Lock()
+
+def record_stage_metric(work_dir: str, node: str, sec: float):
+    """STAGE_METRICS_PATH가 설정된 경우 노드별 소요 시간을 JSONL로 기록 (부하 테스트 집계용)"""
+    path = os.getenv("STAGE_METRICS_PATH")
+    if not path:
+        return
+    line = json.dumps({"run": work_dir, "node": node, "sec": sec, "ts": time.time()}, ensure_ascii=False)
+    with _metrics_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+def graph_recursion_limit(pptx_path: str) -> int:
+    """슬라이드 수에 맞춘 LangGraph recursion_limit (슬라이드당 최대 6 step + 준비/마무리)"""
+    try:
+        total = len(Presentation(pptx_path).slides)
+    except Exception:
+        total = 0
+    return max(100, total * 6 + 10)
+
+def prepare_work_dir(pptx_file):
+    """실행별 작업 디렉터리를 만들고 업로드된 PPTX를 복사"""
     # 작업 디렉터리 설정
-    WORK_DIR = os.path.join("./gradio_output", f"run-{int(time.time())}")
+    # 같은 초에 들어온 동시 업로드끼리 디렉터리가 겹치지 않도록 고유 접미사 추가
+    WORK_DIR = os.path.join("./gradio_output", f"run-{int(time.time())}-{uuid.uuid4().hex[:8]}")
     MEDIA_DIR = os.path.join(WORK_DIR, "media")
     SLIDES_DIR = os.path.join(WORK_DIR, "slides")
 
@@ -62,9 +107,21 @@ def generate_state_and_run(pptx_file, tone, voice, style, target_duration_sec, s
     os.makedirs(SLIDES_DIR, exist_ok=True)
 
     # 임시 파일 경로 설정 및 복사
-    uploaded_file_path = pptx_file.name # Gradio File 객체의 name 속성이 파일 경로
+    uploaded_file_path = pptx_file.name if hasattr(pptx_file, "name") else pptx_file # File 객체 또는 filepath 문자열
     pptx_path = os.path.join(WORK_DIR, os.path.basename(uploaded_file_path))
     shutil.copy(uploaded_file_path, pptx_path)
+    return WORK_DIR, pptx_path
+
+
+def generate_state_and_run(pptx_file, tone, voice, style, target_duration_sec, speed,
+                           output_mode="MP4 (완료 후 재생) -mp4", remux_mp4=True):
+    # API Key 로딩 (Gradio 환경에서 재실행 방지)
+    # NOTE: GitHub에서는 이 부분이 환경 변수 설정으로 대체되어야 합니다.
+    if not os.getenv('OPENAI_API_KEY'):
+        yield None, None, "API 키가 설정되지 않았습니다.", []
+        return
+
+    WORK_DIR, pptx_path = prepare_work_dir(pptx_file)
     
     # State 초기화 및 설정
     USER_PROMPT = {
@@ -72,7 +129,9 @@ def generate_state_and_run(pptx_file, tone, voice, style, target_duration_sec, s
         "voice": voice,
         "style": style,
         "target_duration_sec": int(target_duration_sec),
-        "speed": float(speed)
+        "speed": float(speed),
+        "output_mode": output_mode,
+        "remux_mp4": bool(remux_mp4)
     }
 
     state = {
@@ -82,18 +141,115 @@ def generate_state_and_run(pptx_file, tone, voice, style, target_duration_sec, s
         "slide_index": 0
     }
 
-    # 실제 Agent 그래프(app) 실행
-    final_state = app.invoke(state, config={"recursion_limit": 100})
+    # 실제 Agent 그래프(app) 실행: 슬라이드가 완성될 때마다 새 HLS 세그먼트를 미리보기로 전달
+    # (step별 소요 시간과 최대 RSS를 함께 기록하여 대형 덱의 메모리/오버헤드를 확인)
+    final_state = state
+    streamed = 0
+    streamed_slides = 0
+    step_started = time.perf_counter()
+    config = {"recursion_limit": graph_recursion_limit(pptx_path)}
+    for mode, chunk in app.stream(state, config=config, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            now = time.perf_counter()
+            for node in chunk:
+                print(f"[STEP] {node}: {now - step_started:.2f}s, peak RSS {peak_rss_mb():.1f}MB")
+                record_stage_metric(WORK_DIR, node, now - step_started)
+            step_started = now
+            continue
+
+        final_state = chunk
+        # slide_index 이전 슬라이드는 처리가 끝났으므로, 새로 끝난 슬라이드의 세그먼트만 저장소에서 읽어 전달
+        settled = final_state.get("slide_index", 0) if final_state.get("hls_playlist") else 0
+        if settled > streamed_slides:
+            with open_store(final_state) as store:
+                segments = [seg for idx in range(streamed_slides, settled) for seg in store.get(idx, "hls_segments", [])]
+            streamed_slides = settled
+            for segment in segments:
+                streamed += 1
+                yield segment, gr.update(), gr.update(), gr.update()
+
+    for endpoint, stats in resilient.latency_report().items():
+        print(f"[LATENCY] {endpoint}: {stats}")
 
     final_video = final_state.get("final_video", None)
     quiz_set = final_state.get("quiz_set", [])
     quiz_md = display_quizzes(quiz_set)
 
     # Gradio는 File 객체나 경로를 반환해야 다운로드가 가능
+    preview = gr.update() if streamed else final_video # 이미 스트리밍한 경우 미리보기는 그대로 유지
     if final_video and os.path.exists(final_video):
-        return final_video, final_video, quiz_md, quiz_set
+        yield preview, final_video, quiz_md, quiz_set
+    elif streamed:
+        yield gr.update(), None, quiz_md, quiz_set
     else:
-        return None, None, "❌ 영상 제작에 실패했습니다. (로그 확인 필요)", []
+        yield None, None, "❌ 영상 제작에 실패했습니다. (로그 확인 필요)", []
+
+
+VARIANT_KEYS = {"voice": str, "speed": (int, float), "width": int, "height": int}
+
+def parse_variants(variants) -> List[dict]:
+    """변형 목록(JSON 문자열 또는 list)을 검사하여 반환, 형식이 잘못되면 ValueError"""
+    if isinstance(variants, str):
+        try:
+            variants = json.loads(variants or "[]")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"변형 목록 JSON을 해석할 수 없습니다: {e}")
+    if not isinstance(variants, list):
+        raise ValueError("변형 목록은 JSON 배열이어야 합니다.")
+    for i, v in enumerate(variants, 1):
+        if not isinstance(v, dict):
+            raise ValueError(f"{i}번째 변형이 객체가 아닙니다: {v!r}")
+        unknown = set(v) - set(VARIANT_KEYS)
+        if unknown:
+            raise ValueError(f"{i}번째 변형에 알 수 없는 키가 있습니다: {', '.join(sorted(unknown))}")
+        if not isinstance(v.get("voice"), str) or not v["voice"].strip():
+            raise ValueError(f"{i}번째 변형에 voice가 없습니다.")
+        for key, expected in VARIANT_KEYS.items():
+            value = v.get(key)
+            # bool은 int의 하위 타입이라 별도로 제외
+            if key in v and (isinstance(value, bool) or not isinstance(value, expected) or (key != "voice" and value <= 0)):
+                raise ValueError(f"{i}번째 변형의 {key} 값이 올바르지 않습니다: {value!r}")
+        # libx264 yuv420p는 홀수 해상도를 인코딩하지 못하므로 모든 슬라이드가 실패하기 전에 거부
+        for key in ("width", "height"):
+            if key in v and v[key] % 2:
+                raise ValueError(f"{i}번째 변형의 {key}는 짝수여야 합니다: {v[key]!r}")
+    return variants
+
+def generate_variants_and_run(pptx_file, tone, style, target_duration_sec, variants):
+    """하나의 PPT를 여러 voice/speed/해상도 조합으로 렌더링 (스크립트까지는 1회만 생성)
+
+    variants: [{"voice": "alloy", "speed": 1.0, "width": 1920, "height": 1080}, ...] 또는 그 JSON 문자열
+    """
+    if not os.getenv('OPENAI_API_KEY'):
+        return [], [], "API 키가 설정되지 않았습니다.", []
+
+    try:
+        variants = parse_variants(variants)
+    except ValueError as e:
+        return [], [], f"❌ {e}", []
+    if not variants:
+        return [], [], "❌ 렌더링할 변형이 없습니다.", []
+
+    WORK_DIR, pptx_path = prepare_work_dir(pptx_file)
+
+    state = {
+        "pptx_path": pptx_path,
+        "work_dir": WORK_DIR,
+        "prompt": {
+            "tone": tone,
+            "style": style,
+            "target_duration_sec": int(target_duration_sec)
+        },
+        "variants": variants,
+        "slide_index": 0
+    }
+
+    final_state = variant_app.invoke(state, config={"recursion_limit": graph_recursion_limit(pptx_path)})
+
+    variant_videos = final_state.get("variant_videos", [])
+    quiz_set = final_state.get("quiz_set", [])
+    files = [v["final_video"] for v in variant_videos if v.get("final_video") and os.path.exists(v["final_video"])]
+    return variant_videos, files, display_quizzes(quiz_set), quiz_set
 
 
 def display_quizzes(quiz_set):
@@ -103,7 +259,7 @@ def display_quizzes(quiz_set):
     md = "## 🧠 복습 퀴즈\\n\\n"
     for i, q in enumerate(quiz_set, 1):
         md += f"**Q{i}. {q['question']}**\\n"
-        for opt in q[\"options\"]:
+        for opt in q["options"]:
             md += f"- {opt}\\n"
         md += "\\n"
     return md
@@ -122,9 +278,10 @@ def display_answers(quiz_set):
 tone_choices = ["친절하고 명료한 강의 톤", "열정적이고 에너지 넘치는 발표 톤", "차분하고 신뢰감 있는 설명 톤", "격식 있고 전문적인 톤"]
 voice_choices = ["교육·온라인 수업용 -alloy", "감정 전달 중심 -fable", "기술 세미나용 -onyx", "홍보·SNS용 -verse", "명상·상담용 -coral"]
 style_choices = ["예시와 핵심 요점 중심", "스토리텔링 중심", "데이터 기반 설명", "감정과 공감 중심"]
+output_choices = ["MP4 (완료 후 재생) -mp4", "HLS (렌더링 중 재생) -hls"]
 
 
-with gr.Blocks(theme=\"soft\", title=\"🎬 AI 슬라이드 강의 생성기\") as demo:
+with gr.Blocks(theme="soft", title="🎬 AI 슬라이드 강의 생성기") as demo:
     gr.Markdown("## 🎬 AI 슬라이드 강의 생성기")
     gr.Markdown("PPTX를 업로드하고, 말투·목소리·스타일·속도를 선택한 뒤 **실행**을 누르면 AI가 자동으로 강의 영상을 생성합니다.")
 
@@ -133,39 +290,44 @@ with gr.Blocks(theme=\"soft\", title=\"🎬 AI 슬라이드 강의 생성기\")
 
     # 입력 영역
     with gr.Row():
-        inp_ppt = gr.File(label=\"🎞️ PPTX 파일 업로드\", file_types=[\".pptx\"], type=\"filepath\")
+        inp_ppt = gr.File(label="🎞️ PPTX 파일 업로드", file_types=[".pptx"], type="filepath")
 
     with gr.Row():
-        inp_tone  = gr.Radio(label=\"🗣️ 말투 (tone)\", choices=tone_choices, value=\"친절하고 명료한 강의 톤\")
-        inp_voice = gr.Radio(label=\"🎤 목소리 (voice)\", choices=voice_choices, value=\"교육·온라인 수업용 -alloy\")
+        inp_tone  = gr.Radio(label="🗣️ 말투 (tone)", choices=tone_choices, value="친절하고 명료한 강의 톤")
+        inp_voice = gr.Radio(label="🎤 목소리 (voice)", choices=voice_choices, value="교육·온라인 수업용 -alloy")
 
     with gr.Row():
-        inp_style = gr.Radio(label=\"🧩 스타일 (style)\", choices=style_choices, value=\"예시와 핵심 요점 중심\")
-        inp_duration = gr.Number(label=\"📄 페이지 당 목표 시간 (초)\", value=60, precision=0)
+        inp_style = gr.Radio(label="🧩 스타일 (style)", choices=style_choices, value="예시와 핵심 요점 중심")
+        inp_duration = gr.Number(label="📄 페이지 당 목표 시간 (초)", value=60, precision=0)
         inp_speed = gr.Slider(
-            label=\"🎚️ 음성 속도 (Speed)\",
-            minimum=0.8, maximum=2.0, step=0.1, value=1.0, info=\"음성 재생 속도를 조절하세요 (0.8x~2.0x)\"
+            label="🎚️ 음성 속도 (Speed)",
+            minimum=0.8, maximum=2.0, step=0.1, value=1.0, info="음성 재생 속도를 조절하세요 (0.8x~2.0x)"
         )
 
-    run_btn = gr.Button("🚀 실행", variant=\"primary\")
+    with gr.Row():
+        inp_output = gr.Radio(label="📡 출력 방식", choices=output_choices, value="MP4 (완료 후 재생) -mp4")
+        inp_remux = gr.Checkbox(label="💾 HLS 완료 후 MP4도 생성", value=True)
+
+    run_btn = gr.Button("🚀 실행", variant="primary")
 
     # 출력 구역
     with gr.Row():
-        out_video = gr.Video(label=\"📽️ 최종 동영상 미리보기\", interactive=False)
-        quiz_md = gr.Markdown(label=\"🧠 복습 퀴즈\", value=\"(퀴즈가 여기에 표시됩니다.)\")
+        out_video = gr.Video(label="📽️ 최종 동영상 미리보기", interactive=False, streaming=True, autoplay=True)
+        quiz_md = gr.Markdown(label="🧠 복습 퀴즈", value="(퀴즈가 여기에 표시됩니다.)")
 
-    out_download = gr.DownloadButton(label=\"💾 동영상 다운로드\", visible=False)
+    out_download = gr.DownloadButton(label="💾 동영상 다운로드", visible=False)
 
     # ✅ 정답 보기 추가
-    show_answer_btn = gr.Button("✅ 정답 보기", variant=\"secondary\")
-    out_answer_md = gr.Markdown(label=\"정답\", value=\"(정답을 보려면 버튼을 누르세요)\")
+    show_answer_btn = gr.Button("✅ 정답 보기", variant="secondary")
+    out_answer_md = gr.Markdown(label="정답", value="(정답을 보려면 버튼을 누르세요)")
     
     # 버튼 연결
     run_btn_outputs = [out_video, out_download, quiz_md, quiz_state]
     run_btn.click(
         fn=generate_state_and_run,
-        inputs=[inp_ppt, inp_tone, inp_voice, inp_style, inp_duration, inp_speed],
-        outputs=run_btn_outputs
+        inputs=[inp_ppt, inp_tone, inp_voice, inp_style, inp_duration, inp_speed, inp_output, inp_remux],
+        outputs=run_btn_outputs,
+        api_name="generate_state_and_run"
     ).then(
         # 다운로드 버튼 활성화 (visibility 속성 업데이트 필요)
         lambda x: gr.update(value=x, visible=True),
@@ -173,11 +335,38 @@ with gr.Blocks(theme=\"soft\", title=\"🎬 AI 슬라이드 강의 생성기\")
         outputs=out_download
     )
 
+    # 🎛️ 멀티 변형 렌더링 (같은 PPT를 여러 목소리/속도/해상도로)
+    with gr.Accordion("🎛️ 멀티 변형 렌더링", open=False):
+        inp_variants = gr.Code(
+            label="변형 목록 (JSON)", language="json",
+            value=json.dumps([
+                {"voice": "alloy", "speed": 1.0, "width": 1920, "height": 1080},
+                {"voice": "alloy", "speed": 1.2, "width": 1280, "height": 720},
+                {"voice": "onyx", "speed": 1.0, "width": 1920, "height": 1080}
+            ], ensure_ascii=False, indent=2)
+        )
+        variant_btn = gr.Button("🚀 변형 일괄 실행", variant="secondary")
+        out_variants = gr.JSON(label="변형별 결과")
+        out_variant_files = gr.File(label="💾 변형별 동영상", file_count="multiple")
+
+    variant_btn.click(
+        fn=generate_variants_and_run,
+        inputs=[inp_ppt, inp_tone, inp_style, inp_duration, inp_variants],
+        outputs=[out_variants, out_variant_files, quiz_md, quiz_state],
+        api_name="generate_variants"
+    )
+
     show_answer_btn.click(
         fn=display_answers,
         inputs=[quiz_state],
         outputs=[out_answer_md]
     )
 
+def launch(share=True, **kwargs):
+    """상주 LibreOffice 풀을 띄우고 Gradio 서버 실행 (GRADIO_CONCURRENCY: 동시에 처리할 실행 수)"""
+    start_office_pool() # 상주 LibreOffice 변환 프로세스 풀 (LO_POOL_SIZE, LO_POOL_MAX_JOBS)
+    demo.queue(default_concurrency_limit=int(os.getenv("GRADIO_CONCURRENCY", 1)))
+    demo.launch(share=share, **kwargs)
+
 if __name__ == '__main__':
-    demo.launch(share=True)
\ No newline at end of file
+    launch(share=True)
\ No newline at end of file
@@ -0,0 +1,185 @@
+# fake_services.py
+
+import json, time, random, struct, threading, argparse
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional
+
+# ===============================
+# 🔹 지연/오류 주입 설정
+# ===============================
+
+class FaultConfig:
+    """가짜 서버의 지연/오류 주입 설정"""
+
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 100, error_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_ms: float = 5000, tts_chars_per_sec: float = 15.0,
+                 tts_chunk_ms: float = 20):
+        self.latency_ms = latency_ms       # 기본 응답 지연
+        self.jitter_ms = jitter_ms         # 지연 편차 (0 ~ jitter_ms 균등 분포)
+        self.error_rate = error_rate       # 429/500 오류 응답 비율
+        self.slow_rate = slow_rate         # 꼬리 지연(slow_ms 추가) 비율 — hedging 확인용
+        self.slow_ms = slow_ms
+        self.tts_chars_per_sec = tts_chars_per_sec # TTS 음성 길이 = 입력 글자 수 / 이 값
+        self.tts_chunk_ms = tts_chunk_ms   # TTS 스트림 청크 간 간격
+
+    def delay(self) -> float:
+        ms = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if random.random() < self.slow_rate:
+            ms += self.slow_ms
+        return ms / 1000
+
+# ===============================
+# 🔹 응답 생성
+# ===============================
+
+def silent_mp3(seconds: float) -> bytes:
+    """무음 MP3 (MPEG-1 Layer III, 128kbps, 44.1kHz, mono) — 프레임 하나당 1152 샘플"""
+    header = struct.pack(">I", 0xFFFB90C4)
+    frame = header + bytes(417 - len(header))
+    n_frames = max(1, int(seconds * 44100 / 1152))
+    return frame * n_frames
+
+def fake_quiz_json() -> str:
+    quizzes = [{
+        "question": f"강의에서 설명한 핵심 개념 {i}은 무엇인가요?",
+        "options": [f"{n}. 선택지 {n}" for n in range(1, 5)],
+        "answer": "1. 선택지 1",
+    } for i in range(1, 7)]
+    return json.dumps({"quizzes": quizzes}, ensure_ascii=False)
+
+def fake_chat_text() -> str:
+    return ("화면의 그래프에서 확인하실 수 있듯이 이 슬라이드의 핵심은 데이터 흐름입니다. "
+            "각 단계는 앞 단계의 결과를 입력으로 받아 처리합니다. "
+            "이 표에서 보시는 것처럼 처리 시간은 단계마다 다릅니다. "
+            "이어서 다음 주제에서 이 구조를 더 자세히 살펴보겠습니다.")
+
+def fake_search_results(query: str, num: int) -> list:
+    title = query.split(" -site:")[0].strip() or "검색"
+    return [{
+        "title": f"{title} 참고 자료 {i}",
+        "link": f"https://docs.example.com/{abs(hash(title)) % 10000}/{i}",
+        "snippet": f"{title}에 대한 설명 문서 {i}입니다. 주요 개념과 적용 사례를 정리했습니다.",
+    } for i in range(1, num + 1)]
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """OpenAI 호환 엔드포인트 (/v1/chat/completions, /v1/audio/speech)와 SerpAPI(/search.json) 가짜 구현"""
+    protocol_version = "HTTP/1.1"
+    config: FaultConfig = FaultConfig()
+    stats: Dict[str, int] = {}
+    stats_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inject_fault(self, route: str) -> bool:
+        """지연을 적용하고, 오류를 주입했으면 True"""
+        time.sleep(self.config.delay())
+        if random.random() < self.config.error_rate:
+            self._count(f"{route}:error")
+            if random.random() < 0.5:
+                self._send_json(429, {"error": {"message": "Rate limit reached (fake)", "type": "rate_limit_error"}},
+                                headers={"Retry-After": "1"})
+            else:
+                self._send_json(500, {"error": {"message": "Internal error (fake)", "type": "server_error"}})
+            return True
+        return False
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            return json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def do_GET(self):
+        if self.path.startswith("/stats"):
+            with self.stats_lock:
+                return self._send_json(200, dict(self.stats))
+        if self.path.startswith("/search.json"):
+            self._count("search")
+            if self._inject_fault("search"): return
+            params = parse_qs(urlparse(self.path).query)
+            query = params.get("q", [""])[0]
+            num = int(params.get("num", ["4"])[0])
+            return self._send_json(200, {"organic_results": fake_search_results(query, num)})
+        self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def do_POST(self):
+        body = self._read_json()
+        if self.path.endswith("/chat/completions"):
+            self._count("chat")
+            if self._inject_fault("chat"): return
+            is_json = (body.get("response_format") or {}).get("type") == "json_object"
+            content = fake_quiz_json() if is_json else fake_chat_text()
+            return self._send_json(200, {
+                "id": f"chatcmpl-fake-{random.randrange(1 << 30)}", "object": "chat.completion",
+                "created": int(time.time()), "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        if self.path.endswith("/audio/speech"):
+            self._count("tts")
+            if self._inject_fault("tts"): return
+            seconds = max(1.0, len(body.get("input", "")) / self.config.tts_chars_per_sec)
+            audio = silent_mp3(seconds)
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(audio)))
+            self.end_headers()
+            # 실제 TTS처럼 조금씩 나누어 전송
+            for i in range(0, len(audio), 4096):
+                self.wfile.write(audio[i:i+4096])
+                self.wfile.flush()
+                time.sleep(self.config.tts_chunk_ms / 1000)
+            return
+
+        self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+# ===============================
+# 🔹 서버 실행
+# ===============================
+
+def start_fake_services(port: int = 0, config: Optional[FaultConfig] = None, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """가짜 서버를 백그라운드 스레드로 실행 (port=0이면 빈 포트 자동 선택, server.server_address로 확인)"""
+    handler = type("ConfiguredFakeHandler", (FakeHandler,), {"config": config or FaultConfig(), "stats": {}})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지연/오류를 주입하는 로컬 OpenAI/SerpAPI 호환 가짜 서버")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=5000)
+    parser.add_argument("--tts-chars-per-sec", type=float, default=15.0)
+    args = parser.parse_args()
+
+    server = start_fake_services(args.port, FaultConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        slow_rate=args.slow_rate, slow_ms=args.slow_ms, tts_chars_per_sec=args.tts_chars_per_sec))
+    print(f"[가짜 서버] OPENAI_BASE_URL=http://127.0.0.1:{args.port}/v1, SERPAPI_ENDPOINT=http://127.0.0.1:{args.port}/search.json")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,274 @@
+# loadtest.py
+
+import os, sys, json, time, signal, socket, argparse, tempfile, threading, subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+from pptx import Presentation
+from pptx.util import Inches
+from gradio_client import Client, handle_file
+from gradio_client.utils import Status
+
+from fake_services import start_fake_services, FaultConfig
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# ===============================
+# 🔹 테스트용 PPT 생성
+# ===============================
+
+def make_deck(path: Path, n_slides: int, seed: int = 0) -> Path:
+    """제목/본문/표가 들어간 테스트 덱 생성"""
+    ppt = Presentation()
+    for i in range(n_slides):
+        slide = ppt.slides.add_slide(ppt.slide_layouts[1]) # 제목 + 내용
+        slide.shapes.title.text = f"[{seed}] 주제 {i+1}: 데이터 파이프라인 구성"
+        body = slide.placeholders[1].text_frame
+        body.text = "수집된 데이터는 정제 단계를 거쳐 저장소에 적재됩니다."
+        for line in ("배치와 스트리밍 처리를 함께 사용합니다.", "단계별 처리 시간을 모니터링합니다."):
+            body.add_paragraph().text = line
+        if i % 3 == 2:
+            table = slide.shapes.add_table(3, 3, Inches(1), Inches(4.5), Inches(6), Inches(1.2)).table
+            for r in range(3):
+                for c in range(3):
+                    table.cell(r, c).text = "항목" if r == 0 else f"{r*c}"
+    ppt.save(str(path))
+    return path
+
+# ===============================
+# 🔹 자원 사용량 샘플링 (/proc, Linux)
+# ===============================
+
+def _cpu_times() -> tuple:
+    with open("/proc/stat") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + values[4] # idle + iowait
+    return sum(values), idle, values[4]
+
+def _disk_stats() -> Dict[str, tuple]:
+    """디스크별 (읽은 섹터, 쓴 섹터, io_ticks ms) — 파티션/가상 장치 제외"""
+    stats = {}
+    with open("/proc/diskstats") as f:
+        for line in f:
+            parts = line.split()
+            name = parts[2]
+            if name.startswith(("loop", "ram", "dm-")) or not os.path.exists(f"/sys/block/{name}"):
+                continue
+            stats[name] = (int(parts[5]), int(parts[9]), int(parts[12]))
+    return stats
+
+class ResourceSampler(threading.Thread):
+    """interval마다 CPU 사용률/iowait, 디스크 사용률(io_ticks)과 처리량을 기록"""
+
+    def __init__(self, interval: float = 1.0):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        prev_cpu, prev_disk, prev_t = _cpu_times(), _disk_stats(), time.monotonic()
+        while not self._stop_event.wait(self.interval):
+            cpu, disk, now = _cpu_times(), _disk_stats(), time.monotonic()
+            dt_total = max(cpu[0] - prev_cpu[0], 1)
+            elapsed_ms = (now - prev_t) * 1000
+            disk_util = max([(disk[d][2] - prev_disk[d][2]) / elapsed_ms for d in disk if d in prev_disk] or [0.0])
+            read_mb = sum(disk[d][0] - prev_disk[d][0] for d in disk if d in prev_disk) * 512 / 1e6
+            write_mb = sum(disk[d][1] - prev_disk[d][1] for d in disk if d in prev_disk) * 512 / 1e6
+            self.samples.append({
+                "cpu_util": 1 - (cpu[1] - prev_cpu[1]) / dt_total,
+                "iowait": (cpu[2] - prev_cpu[2]) / dt_total,
+                "disk_util": min(disk_util, 1.0),
+                "read_mb_s": read_mb / (now - prev_t),
+                "write_mb_s": write_mb / (now - prev_t),
+                "loadavg": os.getloadavg()[0],
+            })
+            prev_cpu, prev_disk, prev_t = cpu, disk, now
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        keys = self.samples[0].keys() if self.samples else []
+        return {k: {"avg": sum(s[k] for s in self.samples) / len(self.samples),
+                    "max": max(s[k] for s in self.samples)} for k in keys}
+
+# ===============================
+# 🔹 통계 유틸
+# ===============================
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    data = sorted(values)
+    def pick(q):
+        return data[min(len(data) - 1, int(round(q * (len(data) - 1))))] if data else None
+    return {"count": len(data), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": data[-1] if data else None}
+
+# ===============================
+# 🔹 앱 실행 / 사용자 시뮬레이션
+# ===============================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def launch_app(port: int, env: Dict[str, str], log_path: Path) -> subprocess.Popen:
+    """app.launch()를 별도 프로세스로 실행하고 포트가 열릴 때까지 대기"""
+    code = f"import app; app.launch(share=False, server_name='127.0.0.1', server_port={port})"
+    # 자식 프로세스가 로그 파일을 물려받으므로 부모 쪽 핸들은 바로 닫음
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen([sys.executable, "-c", code], cwd=REPO_DIR, env={**os.environ, **env},
+                                stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    deadline = time.monotonic() + 180
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"앱 프로세스가 종료되었습니다. 로그: {log_path}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return proc
+        except OSError:
+            time.sleep(0.5)
+    stop_app(proc)
+    raise RuntimeError(f"앱이 시작되지 않았습니다. 로그: {log_path}")
+
+def stop_app(proc: subprocess.Popen, timeout: float = 30):
+    """앱 종료: Ctrl+C(SIGINT)로 Gradio와 LibreOffice 풀을 정상 종료하고, 응답이 없으면 SIGTERM,
+    마지막으로 프로세스 그룹에 남은 자식까지 SIGKILL로 정리"""
+    for sig, wait_sec in ((signal.SIGINT, timeout), (signal.SIGTERM, 10)):
+        if proc.poll() is not None:
+            break
+        proc.send_signal(sig)
+        try:
+            proc.wait(timeout=wait_sec)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    proc.wait()
+
+def run_user(user_id: int, url: str, deck: Path, runs: int, args, results: List[dict], lock: threading.Lock):
+    """가상 사용자 1명: 덱 업로드 → 실행 완료까지 대기를 runs번 반복"""
+    client = Client(url, verbose=False)
+    for r in range(runs):
+        submitted = time.monotonic()
+        started = None
+        record = {"user": user_id, "run": r, "ok": False}
+        try:
+            job = client.submit(
+                handle_file(str(deck)), "친절하고 명료한 강의 톤", "교육·온라인 수업용 -alloy", "예시와 핵심 요점 중심",
+                args.target_duration, args.speed, "MP4 (완료 후 재생) -mp4", True,
+                api_name="/generate_state_and_run")
+            # 대기열에서 빠져 실제 처리가 시작된 시점을 폴링으로 기록
+            while not job.done():
+                code = job.status().code
+                if started is None and code in (Status.PROCESSING, Status.ITERATING, Status.PROGRESS):
+                    started = time.monotonic()
+                time.sleep(0.1)
+            outputs = job.outputs()
+            finished = time.monotonic()
+            final = outputs[-1] if outputs else None
+            record.update({
+                "ok": bool(final and final[1]),
+                "queue_sec": (started or finished) - submitted,
+                "latency_sec": finished - submitted,
+            })
+        except Exception as e:
+            record.update({"error": f"{type(e).__name__}: {e}", "latency_sec": time.monotonic() - submitted})
+        with lock:
+            results.append(record)
+        print(f"[user {user_id}] run {r+1}/{runs}: {'OK' if record['ok'] else 'FAIL'} {record.get('latency_sec', 0):.1f}s")
+
+def load_stage_metrics(path: Path) -> Dict[str, Dict[str, Optional[float]]]:
+    per_node: Dict[str, List[float]] = {}
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            m = json.loads(line)
+            per_node.setdefault(m["node"], []).append(m["sec"])
+    return {node: percentiles(v) for node, v in per_node.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Gradio 서비스 동시 사용자 부하 테스트 (OpenAI/TTS/SerpAPI는 가짜 서버, soffice/ffmpeg는 실제 실행)")
+    parser.add_argument("--users", type=int, default=4, help="동시 사용자 수")
+    parser.add_argument("--runs-per-user", type=int, default=1)
+    parser.add_argument("--slides", type=int, default=5, help="생성할 테스트 덱의 슬라이드 수")
+    parser.add_argument("--gradio-concurrency", type=int, default=1, help="앱의 동시 실행 수 (GRADIO_CONCURRENCY)")
+    parser.add_argument("--target-duration", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=300, help="가짜 API 기본 지연")
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--app-url", default=None, help="이미 실행 중인 앱 주소 (지정 시 앱을 띄우지 않음)")
+    parser.add_argument("--out", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="loadtest_"))
+    metrics_path = work / "stage_metrics.jsonl"
+
+    fake = start_fake_services(0, FaultConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                              error_rate=args.error_rate, slow_rate=args.slow_rate))
+    fake_url = f"http://127.0.0.1:{fake.server_address[1]}"
+
+    app_proc = None
+    url = args.app_url
+    if url is None:
+        port = _free_port()
+        app_proc = launch_app(port, {
+            "OPENAI_BASE_URL": f"{fake_url}/v1",
+            "OPENAI_API_KEY": "sk-loadtest",
+            "SERPAPI_ENDPOINT": f"{fake_url}/search.json",
+            "SERPAPI_API_KEY": "loadtest",
+            "SEARCH_BACKEND": "serpapi",
+            "STAGE_METRICS_PATH": str(metrics_path),
+            "GRADIO_CONCURRENCY": str(args.gradio_concurrency),
+        }, work / "app.log")
+        url = f"http://127.0.0.1:{port}/"
+
+    try:
+        # 사용자마다 다른 덱 (같은 파일 이름 충돌 방지)
+        decks = [make_deck(work / f"deck_user{u+1}.pptx", args.slides, seed=u) for u in range(args.users)]
+
+        results: List[dict] = []
+        lock = threading.Lock()
+        sampler = ResourceSampler()
+        sampler.start()
+        started = time.monotonic()
+        users = [threading.Thread(target=run_user, args=(u, url, decks[u], args.runs_per_user, args, results, lock))
+                 for u in range(args.users)]
+        for t in users: t.start()
+        for t in users: t.join()
+        wall = time.monotonic() - started
+        sampler.stop()
+    finally:
+        # 앱(및 LibreOffice 풀)이 남지 않도록 실패 시에도 종료
+        if app_proc is not None:
+            stop_app(app_proc)
+    fake_stats = dict(fake.RequestHandlerClass.stats)
+    fake.shutdown()
+
+    ok = [r for r in results if r["ok"]]
+    report = {
+        "config": vars(args),
+        "wall_sec": wall,
+        "runs": len(results),
+        "succeeded": len(ok),
+        "throughput_runs_per_min": len(ok) / wall * 60 if wall else 0.0,
+        "slides_per_min": len(ok) * args.slides / wall * 60 if wall else 0.0,
+        "latency_sec": percentiles([r["latency_sec"] for r in ok]),
+        "queue_delay_sec": percentiles([r["queue_sec"] for r in ok]),
+        "stage_sec": load_stage_metrics(metrics_path),
+        "resources": sampler.summary(),
+        "fake_service_requests": fake_stats,
+        "errors": [r["error"] for r in results if "error" in r],
+        "work_dir": str(work),
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
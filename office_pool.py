@@ -0,0 +1,264 @@
+# office_pool.py
+
+import os, time, socket, shutil, signal, tempfile, threading, subprocess, queue, atexit
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+# LibreOffice UNO 파이썬 바인딩 (python3-uno). 없으면 utils.export_slide_as_png가 cold soffice로 대체
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    HAS_UNO = True
+except ImportError:
+    uno = None
+    HAS_UNO = False
+
+# ===============================
+# 🔹 상주 LibreOffice 변환 프로세스
+# ===============================
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _prop(name: str, value) -> "PropertyValue":
+    p = PropertyValue()
+    p.Name, p.Value = name, value
+    return p
+
+class OfficeWorker:
+    """전용 프로필과 UNO 소켓을 가진 상주 LibreOffice(soffice --headless) 프로세스 1개"""
+
+    def __init__(self, worker_id: int, start_timeout_sec: float = 60.0,
+                 convert_timeout_sec: float = 120.0, health_timeout_sec: float = 5.0):
+        self.worker_id = worker_id
+        self.start_timeout_sec = start_timeout_sec
+        self.convert_timeout_sec = convert_timeout_sec # 변환 1건 제한 시간 (넘으면 프로세스를 죽이고 재시작)
+        self.health_timeout_sec = health_timeout_sec
+        self.profile_dir = tempfile.mkdtemp(prefix=f"lo_profile_{worker_id}_") # 워커마다 별도 프로필 (lock 충돌 방지)
+        self.proc: Optional[subprocess.Popen] = None
+        self.desktop = None
+        self.port = 0
+        self.jobs = 0
+
+    def start(self):
+        """soffice를 띄우고 UNO 소켓에 연결될 때까지 대기"""
+        self.port = _free_port()
+        env = os.environ.copy()
+        env.update({"LANG": "ko_KR.UTF-8", "LC_ALL": "ko_KR.UTF-8"})
+        cmd = ["soffice", "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", "--nolockcheck",
+               f"-env:UserInstallation={Path(self.profile_dir).as_uri()}",
+               f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"]
+        # 별도 프로세스 그룹: soffice 래퍼가 띄운 soffice.bin까지 killpg로 함께 정리
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+                                     start_new_session=True)
+
+        deadline = time.monotonic() + self.start_timeout_sec
+        while True:
+            try:
+                self.desktop = self._connect()
+                break
+            except Exception as e:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"LibreOffice 워커 {self.worker_id} 시작 실패: {e}")
+                time.sleep(0.25)
+        self.jobs = 0
+
+    def _connect(self):
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        ctx = resolver.resolve(f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext")
+        return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+    @staticmethod
+    def _kill_group(proc: subprocess.Popen):
+        """soffice 프로세스 그룹 전체를 강제 종료"""
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    @contextmanager
+    def _watchdog(self, timeout_sec: float, what: str):
+        """timeout_sec 안에 UNO 호출이 끝나지 않으면 soffice를 죽여 멈춘 호출이 예외로 풀려나게 함"""
+        proc = self.proc
+        def _expire():
+            print(f"[LibreOffice 풀 경고] 워커 {self.worker_id} {what} {timeout_sec:g}초 초과, 프로세스 강제 종료")
+            self._kill_group(proc)
+        timer = threading.Timer(timeout_sec, _expire)
+        timer.daemon = True
+        if proc is not None:
+            timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
+
+    def healthy(self) -> bool:
+        """프로세스가 살아 있고 UNO 호출에 응답하는지 확인"""
+        if self.proc is None or self.proc.poll() is not None or self.desktop is None:
+            return False
+        try:
+            with self._watchdog(self.health_timeout_sec, "상태 확인"):
+                self.desktop.getFrames()
+            return self.proc.poll() is None
+        except Exception:
+            return False
+
+    def convert(self, src: Path, dst: Path, filter_name: str):
+        """문서를 열어 지정 필터로 저장 (예: impress_pdf_Export)"""
+        with self._watchdog(self.convert_timeout_sec, "변환"):
+            doc = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(str(src)), "_blank", 0, (_prop("Hidden", True), _prop("ReadOnly", True)))
+            if doc is None:
+                raise RuntimeError(f"문서를 열 수 없습니다: {src}")
+            try:
+                doc.storeToURL(uno.systemPathToFileUrl(str(dst)), (_prop("FilterName", filter_name),))
+            finally:
+                doc.close(True)
+        self.jobs += 1
+
+    def stop(self):
+        """soffice 종료 (프로필은 유지하여 재시작 시 warm 상태로 사용)"""
+        if self.desktop is not None:
+            try:
+                with self._watchdog(10, "종료"):
+                    self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.proc is not None:
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+            self._kill_group(self.proc) # 남은 soffice.bin 정리 (이미 종료됐으면 무시)
+            self.proc.wait()
+            self.proc = None
+
+    def recycle(self):
+        self.stop()
+        self.start()
+
+    def destroy(self):
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+class OfficePool:
+    """상주 LibreOffice 워커 풀: 요청마다 유휴 워커 하나에 변환을 맡기고, 비정상이거나 N건 처리 후에는 재시작"""
+
+    def __init__(self, size: int = 2, max_jobs: int = 50, acquire_timeout_sec: float = 300.0):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.acquire_timeout_sec = acquire_timeout_sec
+        self.workers = [OfficeWorker(i) for i in range(size)]
+        self._idle: "queue.Queue[OfficeWorker]" = queue.Queue()
+
+    def start(self):
+        """모든 워커를 병렬로 시작"""
+        errors = []
+        def _start(worker):
+            try:
+                worker.start()
+                self._idle.put(worker)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=_start, args=(w,)) for w in self.workers]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        if self._idle.empty():
+            raise RuntimeError(f"LibreOffice 워커를 하나도 시작하지 못했습니다: {errors}")
+        for e in errors:
+            print(f"[LibreOffice 풀 경고] {e}")
+
+    def _release(self, worker: OfficeWorker):
+        """작업 수가 한도를 넘은 워커는 백그라운드에서 재시작한 뒤 풀에 반환"""
+        if worker.jobs < self.max_jobs:
+            self._idle.put(worker)
+            return
+        def _recycle():
+            try:
+                worker.recycle()
+            except Exception as e:
+                # 풀에서 빠지지 않도록 반환: 다음 요청의 상태 확인에서 다시 재시작
+                print(f"[LibreOffice 풀 오류] 워커 {worker.worker_id} 재시작 실패: {e}")
+            self._idle.put(worker)
+        threading.Thread(target=_recycle, daemon=True).start()
+
+    def convert_to_pdf(self, pptx: Path, out_dir: Path) -> Path:
+        """PPTX → PDF 변환 (out_dir/<stem>.pdf)"""
+        try:
+            worker = self._idle.get(timeout=self.acquire_timeout_sec)
+        except queue.Empty:
+            raise RuntimeError("유휴 LibreOffice 워커를 기다리다 시간이 초과되었습니다.")
+
+        pdf_path = Path(out_dir) / f"{Path(pptx).stem}.pdf"
+        try:
+            if not worker.healthy():
+                worker.recycle()
+            try:
+                worker.convert(Path(pptx), pdf_path, "impress_pdf_Export")
+            except Exception as e:
+                # 워커 이상으로 판단하고 새 프로세스에서 한 번 더 시도
+                print(f"[LibreOffice 풀 경고] 워커 {worker.worker_id} 변환 실패, 재시작 후 재시도: {e}")
+                worker.recycle()
+                worker.convert(Path(pptx), pdf_path, "impress_pdf_Export")
+        finally:
+            self._release(worker)
+        return pdf_path
+
+    def shutdown(self):
+        """모든 워커 종료 (atexit/SIGTERM에서 중복 호출되어도 안전)"""
+        for worker in self.workers:
+            worker.destroy()
+
+# ===============================
+# 🔹 앱 전역 풀
+# ===============================
+
+_pool: Optional[OfficePool] = None
+_pool_lock = threading.Lock()
+
+def start_office_pool(size: Optional[int] = None, max_jobs: Optional[int] = None) -> Optional[OfficePool]:
+    """앱 시작 시 1회 호출: 상주 LibreOffice 변환 풀 시작 (UNO 바인딩이 없거나 시작 실패 시 None)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        if not HAS_UNO:
+            print("[LibreOffice 풀] python3-uno가 없어 변환마다 soffice를 새로 실행합니다.")
+            return None
+        pool = OfficePool(size=size or int(os.getenv("LO_POOL_SIZE", 2)),
+                          max_jobs=max_jobs or int(os.getenv("LO_POOL_MAX_JOBS", 50)))
+        try:
+            pool.start()
+        except Exception as e:
+            print(f"[LibreOffice 풀 오류] {e}")
+            pool.shutdown()
+            return None
+        atexit.register(pool.shutdown)
+        _install_sigterm_handler(pool)
+        _pool = pool
+        return _pool
+
+def _install_sigterm_handler(pool: OfficePool):
+    """SIGTERM(컨테이너 중지, 부하 테스트 종료 등)에는 atexit가 실행되지 않으므로 직접 풀을 정리한 뒤 종료"""
+    if threading.current_thread() is not threading.main_thread():
+        return # signal 핸들러는 메인 스레드에서만 등록 가능
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def _on_sigterm(signum, frame):
+        pool.shutdown()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
+def get_office_pool() -> Optional[OfficePool]:
+    """시작된 풀 (없으면 None)"""
+    return _pool
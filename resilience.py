@@ -0,0 +1,344 @@
+# resilience.py
+
+import time, random, threading
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional
+
+# openai/httpx는 연결 오류 판별에만 사용 (없어도 아래 자가 점검은 실행 가능)
+try:
+    import openai
+except ImportError:
+    openai = None
+
+# 스트리밍 응답 본문을 읽는 중의 끊김/시간 초과는 openai가 감싸지 않은 HTTP 클라이언트 예외로 올라온다
+# (openai 1.x는 httpx, 3.x는 httpx2)
+TRANSPORT_ERRORS: tuple = ()
+for _name in ("httpx", "httpx2"):
+    try:
+        TRANSPORT_ERRORS += (__import__(_name).TransportError,)
+    except ImportError:
+        pass
+
+# ===============================
+# 🔹 예외 정의
+# ===============================
+
+class CircuitOpenError(RuntimeError):
+    """엔드포인트의 회로가 열려 있어 호출을 즉시 거부한 경우"""
+
+class DeadlineExceeded(TimeoutError):
+    """호출 전체(재시도 포함) 또는 단일 시도가 제한 시간을 넘긴 경우"""
+
+def is_retryable(exc: Exception) -> bool:
+    """재시도해도 되는 오류인지 판단 (429/408/409/5xx, 연결 오류, 시간 초과, 스트림 본문 수신 중 끊김)"""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    retryable = (TimeoutError, ConnectionError) + ((openai.APIConnectionError,) if openai is not None else ()) + TRANSPORT_ERRORS
+    return isinstance(exc, retryable)
+
+def retry_after_sec(exc: Exception) -> Optional[float]:
+    """429 응답의 Retry-After 헤더(초)"""
+    response = getattr(exc, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+# ===============================
+# 🔹 지연 시간 통계 / 회로 차단기
+# ===============================
+
+class LatencyTracker:
+    """엔드포인트별 최근 성공 호출 지연 시간(초)을 보관하고 백분위수를 계산"""
+
+    def __init__(self, window: int = 500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.retries = 0
+        self.hedges = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self.samples.append(latency)
+            self.count += 1
+
+    def incr(self, counter: str):
+        """retries/hedges/failures 카운터 증가 (여러 호출 스레드가 동시에 갱신)"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            data = sorted(self.samples)
+        if len(data) < max(min_samples, 1):
+            return None
+        return data[min(len(data) - 1, int(round(q * (len(data) - 1))))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {"count": self.count, "retries": self.retries, "hedges": self.hedges, "failures": self.failures}
+        return {**counts, "p50": self.percentile(0.50), "p95": self.percentile(0.95), "p99": self.percentile(0.99)}
+
+class CircuitBreaker:
+    """연속 실패가 임계치를 넘으면 일정 시간 호출을 즉시 실패시키고, 이후 1건의 시험 호출로 복구 여부를 확인"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_sec: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_sec = reset_timeout_sec
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self, endpoint: str):
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout_sec:
+                    raise CircuitOpenError(f"{endpoint} 회로 열림: 최근 {self.failures}회 연속 실패")
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open":
+                if self._probing:
+                    raise CircuitOpenError(f"{endpoint} 회로 복구 확인 중")
+                self._probing = True
+
+    def on_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+# ===============================
+# 🔹 Resilient 호출 계층
+# ===============================
+
+class ResilientCaller:
+    """외부 API 호출에 deadline, jitter 재시도, hedging(중복 요청), 회로 차단기를 적용
+
+    fn은 단일 시도에 허용된 timeout(초)을 인자로 받아 요청을 수행한다.
+    예: caller.call("chat", lambda timeout: client.chat.completions.create(..., timeout=timeout))
+    """
+
+    def __init__(self, deadline_sec: float = 180.0, attempt_timeout_sec: float = 60.0,
+                 max_attempts: int = 4, backoff_base_sec: float = 0.5, backoff_max_sec: float = 8.0,
+                 hedge_percentile: Optional[float] = 0.95, hedge_min_samples: int = 20, max_hedges: int = 1,
+                 failure_threshold: int = 5, reset_timeout_sec: float = 30.0, max_workers: int = 32):
+        self.deadline_sec = deadline_sec
+        self.attempt_timeout_sec = attempt_timeout_sec
+        self.max_attempts = max_attempts
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.hedge_percentile = hedge_percentile # None이면 hedging 비활성화
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hedges = max_hedges
+        self.trackers: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
+        self.breakers: Dict[str, CircuitBreaker] = defaultdict(lambda: CircuitBreaker(failure_threshold, reset_timeout_sec))
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resilient")
+
+    def call(self, endpoint: str, fn: Callable[[float], Any], cleanup: Optional[Callable[[Any], None]] = None,
+             hedge: bool = True) -> Any:
+        """fn을 호출하고 결과를 반환 (cleanup: hedging에서 버려진 결과를 정리하는 함수, 예: 스트림 close)
+
+        hedge=False면 중복 요청 없이 호출 스레드에서 fn을 실행하고 남은 전체 deadline을 timeout으로 넘긴다.
+        부수 효과가 있어 동시에 두 번 실행하면 안 되는 작업(예: TTS 스트림을 받아 ffmpeg로 파일 쓰기)용이며,
+        시간 제한은 fn이 직접 지켜야 한다.
+        """
+        breaker, tracker = self.breakers[endpoint], self.trackers[endpoint]
+        deadline = time.monotonic() + self.deadline_sec
+
+        for attempt in range(1, self.max_attempts + 1):
+            breaker.before_call(endpoint)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{endpoint} 전체 제한 시간 초과 ({self.deadline_sec:.0f}s)")
+            try:
+                if hedge:
+                    result = self._hedged_attempt(endpoint, fn, self.attempt_timeout_sec, deadline, cleanup)
+                else:
+                    result = self._inline_attempt(endpoint, fn, deadline)
+                breaker.on_success()
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    if breaker.state == "half_open":
+                        breaker.on_success() # 4xx 응답은 서비스가 살아 있다는 의미
+                    raise
+                breaker.on_failure()
+                tracker.incr("failures")
+                if attempt >= self.max_attempts:
+                    raise
+                # full jitter 지수 백오프 (Retry-After가 있으면 우선)
+                delay = retry_after_sec(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.backoff_max_sec, self.backoff_base_sec * 2 ** (attempt - 1)))
+                if time.monotonic() + delay >= deadline:
+                    raise
+                tracker.incr("retries")
+                print(f"[재시도] {endpoint} {attempt}/{self.max_attempts} 실패 ({type(e).__name__}: {e}), {delay:.2f}s 후 재시도")
+                time.sleep(delay)
+
+    def _inline_attempt(self, endpoint: str, fn: Callable[[float], Any], deadline: float) -> Any:
+        """단일 시도 (hedging 없음): 호출 스레드에서 실행하고 남은 전체 시간을 timeout으로 전달"""
+        started = time.monotonic()
+        result = fn(deadline - started)
+        self.trackers[endpoint].record(time.monotonic() - started)
+        return result
+
+    def _hedged_attempt(self, endpoint: str, fn: Callable[[float], Any], timeout: float, deadline: float,
+                        cleanup: Optional[Callable[[Any], None]]) -> Any:
+        """단일 시도: 지연이 p{hedge_percentile}을 넘으면 같은 요청을 하나 더 보내고 먼저 성공한 결과를 사용
+
+        시도 시간(timeout)과 hedge 기준은 작업이 스레드 풀에서 실제로 실행되기 시작한 시점부터 잰다.
+        풀이 붐벼 대기열에 머문 시간은 전체 deadline에만 포함되어, 대기만으로 시도가 시간 초과되지 않는다.
+        """
+        tracker = self.trackers[endpoint]
+        hedge_after = (tracker.percentile(self.hedge_percentile, self.hedge_min_samples)
+                       if self.hedge_percentile else None)
+        clock: Dict[str, float] = {}
+        clock_lock = threading.Lock()
+        first_started = threading.Event()
+
+        def run():
+            now = time.monotonic()
+            with clock_lock:
+                if "started" not in clock:
+                    clock["started"] = now
+                    first_started.set()
+                budget = min(clock["started"] + timeout, deadline) - now
+            if budget <= 0:
+                raise DeadlineExceeded(f"{endpoint} 응답 시간 초과 ({timeout:.1f}s)")
+            return fn(budget)
+
+        def discard(future):
+            if cleanup and not future.cancelled() and future.exception() is None:
+                try:
+                    cleanup(future.result())
+                except Exception:
+                    pass
+
+        first = self._pool.submit(run)
+        if not first_started.wait(max(deadline - time.monotonic(), 0)):
+            if not first.cancel():
+                first.add_done_callback(discard)
+            raise DeadlineExceeded(f"{endpoint} 실행 대기 중 전체 제한 시간 초과 ({self.deadline_sec:.0f}s)")
+
+        started = clock["started"]
+        end = min(started + timeout, deadline)
+        pending = {first}
+        hedges, errors = 0, []
+
+        while pending:
+            now = time.monotonic()
+            wait_for = end - now
+            can_hedge = hedge_after is not None and hedges < self.max_hedges
+            if can_hedge:
+                wait_for = min(wait_for, started + hedge_after - now)
+            done, pending = wait(pending, timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                tracker.record(time.monotonic() - started)
+                for other in pending: # 늦게 끝난 중복 요청의 결과는 정리
+                    other.add_done_callback(discard)
+                return result
+
+            now = time.monotonic()
+            if not pending:
+                raise errors[-1]
+            if now >= end:
+                for other in pending:
+                    other.add_done_callback(discard)
+                raise DeadlineExceeded(f"{endpoint} 응답 시간 초과 ({timeout:.1f}s)")
+            if can_hedge and now - started >= hedge_after:
+                hedges += 1
+                tracker.incr("hedges")
+                pending.add(self._pool.submit(run))
+
+        raise errors[-1]
+
+    def latency_report(self) -> Dict[str, Dict[str, Any]]:
+        """엔드포인트별 p50/p95/p99 지연 시간, 재시도/hedge/실패 횟수, 회로 상태"""
+        return {ep: {**t.snapshot(), "circuit": self.breakers[ep].state} for ep, t in self.trackers.items()}
+
+if __name__ == "__main__":
+    # 자가 점검: 오류/꼬리 지연을 주입한 가짜 서버(fake_services)로 재시도, hedging, 회로 차단/복구, 백분위수 출력을 확인
+    import json, urllib.request, urllib.error
+    from fake_services import start_fake_services, FaultConfig
+
+    class HTTPStatusError(Exception):
+        """openai SDK 예외처럼 status_code/response.headers를 가진 HTTP 오류"""
+        def __init__(self, err: urllib.error.HTTPError):
+            super().__init__(f"HTTP {err.code}")
+            self.status_code, self.response = err.code, err
+
+    def post_chat(base_url: str, timeout: float) -> dict:
+        req = urllib.request.Request(f"{base_url}/v1/chat/completions", data=b'{"model": "fake"}',
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as res:
+                return json.load(res)
+        except urllib.error.HTTPError as e:
+            raise HTTPStatusError(e) from None
+
+    # 1️⃣ 오류 15%: 재시도로 모두 성공 → 지연 분포가 쌓인 뒤 5%에 1.5초 꼬리 지연을 주입하면 hedging이 가려야 함
+    server = start_fake_services(0, FaultConfig(latency_ms=20, jitter_ms=20, error_rate=0.15))
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    caller = ResilientCaller(deadline_sec=30, attempt_timeout_sec=5, max_attempts=6, hedge_min_samples=20, failure_threshold=100)
+    results = []
+    with ThreadPoolExecutor(max_workers=4) as users:
+        results += users.map(lambda _: caller.call("chat", lambda t: post_chat(url, t)), range(40))
+        server.RequestHandlerClass.config = FaultConfig(latency_ms=20, jitter_ms=20, error_rate=0.15, slow_rate=0.05, slow_ms=1500)
+        results += users.map(lambda _: caller.call("chat", lambda t: post_chat(url, t)), range(80))
+    stats = caller.latency_report()["chat"]
+    print(f"[점검 1] 오류/꼬리 지연 주입: {stats}")
+    assert all(r["choices"] for r in results)
+    assert stats["retries"] > 0 and stats["hedges"] > 0, stats
+    assert None not in (stats["p50"], stats["p95"], stats["p99"]) and stats["p50"] <= stats["p95"] <= stats["p99"]
+    assert stats["p95"] < 1.0, "hedging이 꼬리 지연을 가리지 못함"
+
+    # 2️⃣ 모든 요청 실패 → 3회 후 회로 열림 → 서버 복구 후 reset_timeout이 지나면 시험 호출로 닫힘
+    server.RequestHandlerClass.config = FaultConfig(latency_ms=5, jitter_ms=0, error_rate=1.0)
+    breaker_caller = ResilientCaller(max_attempts=1, failure_threshold=3, reset_timeout_sec=0.5, hedge_percentile=None)
+    for _ in range(3):
+        try:
+            breaker_caller.call("chat", lambda t: post_chat(url, t))
+        except HTTPStatusError:
+            pass
+    try:
+        breaker_caller.call("chat", lambda t: post_chat(url, t))
+        raise AssertionError("회로가 열리지 않음")
+    except CircuitOpenError as e:
+        print(f"[점검 2] 회로 열림: {e}")
+    server.RequestHandlerClass.config = FaultConfig(latency_ms=5, jitter_ms=0)
+    time.sleep(0.6)
+    breaker_caller.call("chat", lambda t: post_chat(url, t))
+    assert breaker_caller.breakers["chat"].state == "closed"
+    print(f"[점검 2] 복구 후 회로: {breaker_caller.breakers['chat'].state}")
+
+    # 3️⃣ 작업 스레드 1개에 0.2초 작업 4건: 대기열 대기는 시도 시간(0.3초)에 포함되지 않아야 함
+    queued_caller = ResilientCaller(attempt_timeout_sec=0.3, max_attempts=1, hedge_percentile=None, max_workers=1)
+    with ThreadPoolExecutor(max_workers=4) as users:
+        done = list(users.map(lambda _: queued_caller.call("slow", lambda t: time.sleep(0.2) or "ok"), range(4)))
+    assert done == ["ok"] * 4
+    print(f"[점검 3] 대기열 대기 중 시도 시간 초과 없음: {queued_caller.latency_report()['slow']}")
+
+    server.shutdown()
+    print("[점검 완료]")
@@ -0,0 +1,325 @@
+# search_backends.py
+
+import os, re, math, time, html, heapq, sqlite3, threading, argparse
+from abc import ABC, abstractmethod
+from typing import List, Dict, Callable, Optional
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlparse
+import requests
+
+# ===============================
+# 🔹 검색 백엔드 인터페이스
+# ===============================
+
+class SearchBackend(ABC):
+    """node_tool_search가 사용하는 검색 백엔드 공통 인터페이스
+
+    search()는 {title, url, snippet, domain} 형태의 dict 목록을 반환해야 한다.
+    """
+    name = "base"
+    query_interval_sec = 0.0 # 연속 쿼리 사이 대기 시간 (외부 API 호출 제한용)
+
+    @abstractmethod
+    def search(self, query: str, num: int = 4) -> List[Dict[str, str]]:
+        ...
+
+# ===============================
+# 🔹 SerpAPI (외부 웹 검색)
+# ===============================
+
+def serpapi_search_by_title(title: str, num: int = 4) -> list[dict]:
+    """SerpAPI를 이용해 실제 검색을 수행하고 필터링된 결과를 반환"""
+    key = os.getenv("SERPAPI_API_KEY")
+    EXCLUDE_DOMAINS = ["blog.naver.com", "tistory.com", "brunch.co.kr", "medium.com", "velog.io", "kin.naver.com", "reddit.com", "youtube.com"]
+    query = f"{title} " + " ".join([f"-site:{d}" for d in EXCLUDE_DOMAINS])
+
+    try:
+        endpoint = os.getenv("SERPAPI_ENDPOINT", "https://serpapi.com/search.json") # 부하 테스트 시 가짜 서버로 교체
+        res = requests.get(endpoint, params={
+            "engine": "google", "q": query, "hl": "ko", "gl": "kr", "num": num, "api_key": key
+        }, timeout=15)
+
+        data = res.json().get("organic_results", []) or []
+        results = []
+        for item in data:
+            url = item.get("link", "")
+            if not url: continue
+            domain = urlparse(url).netloc
+            results.append({
+                "title": item.get("title", ""),
+                "url": url,
+                "snippet": item.get("snippet", ""),
+                "domain": domain
+            })
+        return results
+    except Exception as e:
+        print(f"[SerpAPI 오류] 검색 실패: {e}")
+        return []
+
+class SerpApiBackend(SearchBackend):
+    """SerpAPI(Google) 웹 검색 백엔드"""
+    name = "serpapi"
+    query_interval_sec = 0.2
+
+    def search(self, query: str, num: int = 4) -> List[Dict[str, str]]:
+        return serpapi_search_by_title(query, num=num)
+
+# ===============================
+# 🔹 로컬 전문 검색 (BM25 역색인)
+# ===============================
+
+# 체언 뒤에 붙는 대표 조사/어미 (긴 것부터 매칭)
+KOREAN_SUFFIXES = sorted([
+    "은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "도", "만", "로", "으로",
+    "에서", "에게", "께서", "부터", "까지", "보다", "처럼", "이다", "입니다", "이며", "하고", "에는", "에서는",
+], key=len, reverse=True)
+
+TOKEN_RE = re.compile(r"[가-힣]+|[A-Za-z][A-Za-z0-9+#]*|\d+(?:\.\d+)?")
+
+def strip_korean_suffix(word: str) -> str:
+    """어절 끝의 조사를 제거 (어간이 최소 2글자 남는 경우에만)"""
+    for suffix in KOREAN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """한국어/영문 혼합 토큰화: 한글은 조사를 뗀 어절 + 음절 bigram, 영문/숫자는 소문자 단어"""
+    tokens = []
+    for m in TOKEN_RE.finditer(text or ""):
+        word = m.group(0)
+        if "가" <= word[0] <= "힣":
+            stem = strip_korean_suffix(word)
+            tokens.append(stem)
+            # 띄어쓰기/복합명사 차이를 흡수하기 위한 음절 bigram
+            tokens.extend(stem[i:i+2] for i in range(len(stem) - 1) if len(stem) > 2)
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+DOC_SUFFIXES = (".txt", ".md", ".markdown", ".rst", ".html", ".htm")
+
+def read_document(path: Path) -> tuple:
+    """문서 파일에서 (제목, 본문 텍스트)를 추출"""
+    raw = path.read_text(encoding="utf-8", errors="ignore")
+    title = path.stem
+    if path.suffix.lower() in (".html", ".htm"):
+        m = re.search(r"<title[^>]*>(.*?)</title>", raw, re.I | re.S)
+        if m: title = html.unescape(m.group(1)).strip() or title
+        raw = re.sub(r"<(script|style)[^>]*>.*?</\1>", " ", raw, flags=re.I | re.S)
+        raw = re.sub(r"<br\s*/?>|</p>|</div>|</h\d>|</li>", "\n\n", raw, flags=re.I)
+        raw = html.unescape(re.sub(r"<[^>]+>", " ", raw))
+    else:
+        for line in raw.splitlines():
+            if line.startswith("# "):
+                title = line[2:].strip() or title
+                break
+    return title, raw
+
+def split_passages(text: str, max_chars: int = 600) -> List[str]:
+    """빈 줄 기준 문단을 max_chars 안팎의 검색 단위(passage)로 묶기"""
+    passages, buf = [], ""
+    for para in re.split(r"\n\s*\n", text):
+        para = re.sub(r"\s+", " ", para).strip()
+        if not para: continue
+        if buf and len(buf) + len(para) > max_chars:
+            passages.append(buf)
+            buf = ""
+        buf = f"{buf} {para}".strip()
+    if buf: passages.append(buf)
+    return passages
+
+class LocalIndexBackend(SearchBackend):
+    """문서 디렉터리로부터 만든 디스크 기반 BM25 역색인 백엔드 (SQLite, 외부 의존성 없음)
+
+    색인은 생성 시 한 번 갱신하고, 이후 백그라운드 스레드가 refresh_sec마다 별도 연결로 증분 갱신한다.
+    search()는 읽기만 하며 WAL 스냅샷을 읽으므로 갱신 중에도 기다리지 않는다.
+    """
+    name = "local"
+    K1, B = 1.2, 0.75
+
+    def __init__(self, docs_dir: str, index_path: Optional[str] = None, refresh_sec: float = 60.0, build: bool = True):
+        self.docs_dir = Path(docs_dir).expanduser().resolve()
+        self.index_path = index_path or str(self.docs_dir / ".search_index.sqlite3")
+        self.refresh_sec = refresh_sec # 이 주기마다 변경된 문서만 증분 색인 (0이면 자동 갱신 안 함)
+        self._lock = threading.Lock()        # 검색용 연결 보호
+        self._update_lock = threading.Lock() # 색인 갱신은 한 번에 하나만
+        self._stop = threading.Event()
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        self.conn = self._connect()
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER);
+            CREATE TABLE IF NOT EXISTS passages (id INTEGER PRIMARY KEY, path TEXT, title TEXT, url TEXT, snippet TEXT, length INTEGER);
+            CREATE TABLE IF NOT EXISTS postings (term TEXT, passage_id INTEGER, tf INTEGER);
+            CREATE INDEX IF NOT EXISTS idx_postings_term ON postings(term);
+            CREATE INDEX IF NOT EXISTS idx_postings_passage ON postings(passage_id);
+            CREATE INDEX IF NOT EXISTS idx_passages_path ON passages(path);
+        """)
+        if build:
+            self.update()
+        if refresh_sec > 0:
+            threading.Thread(target=self._refresh_loop, daemon=True, name="search-index-refresh").start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_sec):
+            try:
+                self.update()
+            except Exception as e:
+                print(f"[로컬 검색 오류] 색인 갱신 실패: {e}")
+
+    @staticmethod
+    def _remove_file(conn: sqlite3.Connection, path: str):
+        conn.execute("DELETE FROM postings WHERE passage_id IN (SELECT id FROM passages WHERE path = ?)", (path,))
+        conn.execute("DELETE FROM passages WHERE path = ?", (path,))
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def update(self) -> Dict[str, int]:
+        """추가/수정/삭제된 문서만 다시 색인 (증분 업데이트, 검색용과 별도의 쓰기 연결 사용)"""
+        with self._update_lock:
+            conn = self._connect()
+            try:
+                known = {p: (m, s) for p, m, s in conn.execute("SELECT path, mtime, size FROM files")}
+                seen, added, removed = set(), 0, 0
+                with conn:
+                    if self.docs_dir.is_dir():
+                        for path in self.docs_dir.rglob("*"):
+                            if not path.is_file() or path.suffix.lower() not in DOC_SUFFIXES: continue
+                            st = path.stat()
+                            key = str(path)
+                            seen.add(key)
+                            if known.get(key) == (st.st_mtime, st.st_size): continue
+
+                            self._remove_file(conn, key)
+                            title, text = read_document(path)
+                            for n, passage in enumerate(split_passages(text)):
+                                terms = Counter(tokenize(f"{title} {passage}"))
+                                if not terms: continue
+                                cur = conn.execute(
+                                    "INSERT INTO passages (path, title, url, snippet, length) VALUES (?, ?, ?, ?, ?)",
+                                    (key, title, f"{path.as_uri()}#p{n+1}", passage[:300], sum(terms.values())))
+                                conn.executemany("INSERT INTO postings (term, passage_id, tf) VALUES (?, ?, ?)",
+                                                 [(t, cur.lastrowid, tf) for t, tf in terms.items()])
+                            conn.execute("INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)", (key, st.st_mtime, st.st_size))
+                            added += 1
+                    for key in set(known) - seen:
+                        self._remove_file(conn, key)
+                        removed += 1
+            finally:
+                conn.close()
+        return {"updated": added, "removed": removed}
+
+    def close(self):
+        """백그라운드 갱신을 멈추고 연결 종료"""
+        self._stop.set()
+        with self._lock:
+            self.conn.close()
+
+    def search(self, query: str, num: int = 4) -> List[Dict[str, str]]:
+        terms = Counter(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            # 한 번의 읽기 트랜잭션으로 묶어 갱신 도중에도 일관된 스냅샷을 사용
+            self.conn.execute("BEGIN")
+            try:
+                return self._search(terms, num)
+            finally:
+                self.conn.execute("COMMIT")
+
+    def _search(self, terms: Counter, num: int) -> List[Dict[str, str]]:
+        n_docs, avgdl = self.conn.execute("SELECT COUNT(*), AVG(length) FROM passages").fetchone()
+        if not n_docs:
+            return []
+
+        scores: Dict[int, float] = {}
+        for term, qtf in terms.items():
+            rows = self.conn.execute(
+                "SELECT p.passage_id, p.tf, s.length FROM postings p JOIN passages s ON s.id = p.passage_id WHERE p.term = ?",
+                (term,)).fetchall()
+            if not rows: continue
+            idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            for pid, tf, length in rows:
+                norm = tf + self.K1 * (1 - self.B + self.B * length / avgdl)
+                scores[pid] = scores.get(pid, 0.0) + qtf * idf * tf * (self.K1 + 1) / norm
+
+        # 문서당 가장 높은 passage 하나만 반환
+        results, seen_paths = [], set()
+        for pid, _ in heapq.nlargest(num * 4, scores.items(), key=lambda kv: kv[1]):
+            path, title, url, snippet = self.conn.execute(
+                "SELECT path, title, url, snippet FROM passages WHERE id = ?", (pid,)).fetchone()
+            if path in seen_paths: continue
+            seen_paths.add(path)
+            results.append({"title": title, "url": url, "snippet": snippet, "domain": "local"})
+            if len(results) >= num: break
+        return results
+
+class MultiBackend(SearchBackend):
+    """여러 백엔드를 순서대로 조회하여 URL 중복 없이 num개까지 채움 (예: local 우선, 부족하면 serpapi)"""
+    name = "multi"
+
+    def __init__(self, backends: List[SearchBackend]):
+        self.backends = backends
+        self.query_interval_sec = max((b.query_interval_sec for b in backends), default=0.0)
+
+    def search(self, query: str, num: int = 4) -> List[Dict[str, str]]:
+        results, seen_urls = [], set()
+        for backend in self.backends:
+            for r in backend.search(query, num=num - len(results)):
+                if r["url"] in seen_urls: continue
+                seen_urls.add(r["url"])
+                results.append(r)
+            if len(results) >= num: break
+        return results
+
+# ===============================
+# 🔹 백엔드 등록/선택
+# ===============================
+
+SEARCH_BACKENDS: Dict[str, Callable[[], SearchBackend]] = {
+    "serpapi": SerpApiBackend,
+    "local": lambda: LocalIndexBackend(os.getenv("LOCAL_SEARCH_DOCS_DIR", "./docs"), os.getenv("LOCAL_SEARCH_INDEX")),
+}
+_backend_cache: Dict[str, SearchBackend] = {}
+_backend_lock = threading.Lock() # 동시 실행(GRADIO_CONCURRENCY>1) 시 같은 백엔드가 두 번 생성되지 않도록
+
+def register_search_backend(name: str, factory: Callable[[], SearchBackend]):
+    """새 검색 백엔드 등록 (SEARCH_BACKEND 환경 변수나 prompt['search_backend']로 선택)"""
+    with _backend_lock:
+        SEARCH_BACKENDS[name] = factory
+        _backend_cache.pop(name, None)
+
+def get_search_backend(spec: Optional[str] = None) -> SearchBackend:
+    """'serpapi', 'local', 'local,serpapi' 형태의 설정으로 백엔드를 생성 (인스턴스는 재사용)"""
+    spec = (spec or os.getenv("SEARCH_BACKEND", "serpapi")).strip()
+    with _backend_lock:
+        if spec not in _backend_cache:
+            names = [n.strip() for n in spec.split(",") if n.strip()]
+            unknown = [n for n in names if n not in SEARCH_BACKENDS]
+            if unknown:
+                raise ValueError(f"알 수 없는 검색 백엔드: {unknown} (사용 가능: {list(SEARCH_BACKENDS)})")
+            backends = [SEARCH_BACKENDS[n]() for n in names]
+            _backend_cache[spec] = backends[0] if len(backends) == 1 else MultiBackend(backends)
+        return _backend_cache[spec]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 문서 검색 색인 생성/조회")
+    parser.add_argument("docs_dir", help="색인할 문서 디렉터리")
+    parser.add_argument("--index", default=None, help="색인 파일 경로 (기본: <docs_dir>/.search_index.sqlite3)")
+    parser.add_argument("--query", default=None, help="색인 갱신 후 실행할 검색어")
+    parser.add_argument("--num", type=int, default=4)
+    args = parser.parse_args()
+
+    backend = LocalIndexBackend(args.docs_dir, args.index, refresh_sec=0, build=False)
+    started = time.perf_counter()
+    print(f"[색인] {backend.update()} ({time.perf_counter() - started:.2f}s)")
+    if args.query:
+        started = time.perf_counter()
+        for r in backend.search(args.query, num=args.num):
+            print(f"- {r['title']} ({r['url']})\n  {r['snippet'][:120]}")
+        print(f"[검색] {(time.perf_counter() - started) * 1000:.1f}ms")
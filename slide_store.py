@@ -0,0 +1,71 @@
+# slide_store.py
+
+import os, json, sqlite3
+from typing import Any, Dict, List
+
+STORE_FILENAME = "slide_artifacts.sqlite3"
+
+# ===============================
+# 🔹 슬라이드 산출물 저장소
+# ===============================
+
+class SlideStore:
+    """슬라이드별 산출물(텍스트/표/이미지 경로/스크립트 등)을 SQLite에 저장하고 필요한 슬라이드만 읽어오는 저장소
+
+    LangGraph State에는 store_path(핸들)만 두고, 각 노드는 현재 슬라이드의 값만 로드한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " slide INTEGER NOT NULL, field TEXT NOT NULL, value TEXT,"
+            " PRIMARY KEY (slide, field))"
+        )
+
+    def put(self, slide: int, field: str, value: Any):
+        """슬라이드 하나의 필드 값을 저장 (JSON 직렬화)"""
+        self.put_many(slide, {field: value})
+
+    def put_many(self, slide: int, fields: Dict[str, Any]):
+        """슬라이드 하나의 여러 필드를 한 트랜잭션으로 저장"""
+        rows = [(int(slide), k, json.dumps(v, ensure_ascii=False)) for k, v in fields.items()]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO artifacts (slide, field, value) VALUES (?, ?, ?)", rows)
+
+    def get(self, slide: int, field: str, default: Any = None) -> Any:
+        """슬라이드 하나의 필드 값을 읽기 (없으면 default)"""
+        row = self.conn.execute("SELECT value FROM artifacts WHERE slide = ? AND field = ?", (int(slide), field)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_slide(self, slide: int) -> Dict[str, Any]:
+        """슬라이드 하나의 모든 필드를 dict로 읽기"""
+        rows = self.conn.execute("SELECT field, value FROM artifacts WHERE slide = ?", (int(slide),)).fetchall()
+        return {field: json.loads(value) for field, value in rows}
+
+    def column(self, field: str, total: int, default: Any = None) -> List[Any]:
+        """전체 슬라이드의 특정 필드를 슬라이드 순서대로 읽기 (퀴즈 생성 등 전체가 필요한 경우에만 사용)"""
+        values = [default] * int(total)
+        for slide, value in self.conn.execute("SELECT slide, value FROM artifacts WHERE field = ? ORDER BY slide", (field,)):
+            if 0 <= slide < total:
+                values[slide] = json.loads(value)
+        return values
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_store(state: dict) -> SlideStore:
+    """state의 store_path(없으면 work_dir 아래 기본 경로)로 저장소를 연다"""
+    path = state.get("store_path") or os.path.join(state.get("work_dir", "./"), STORE_FILENAME)
+    return SlideStore(path)
@@ -1,7 +1,7 @@
 # utils.py
 
-import os, re, subprocess, base64, mimetypes, shlex
-from typing import List
+import os, re, time, subprocess, base64, mimetypes, shlex, threading, resource, sys, tempfile
+from typing import List, Iterable, Optional, Union
 from pathlib import Path
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
@@ -13,6 +13,7 @@ from reportlab.lib.units import cm
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from difflib import SequenceMatcher
+from office_pool import get_office_pool
 
 # ===============================
 # 🔹 텍스트 처리 유틸리티
@@ -55,6 +56,44 @@ def img_to_data_url(path: str) -> str:
         b64 = base64.b64encode(f.read()).decode("utf-8")
     return f"data:{mime};base64,{b64}"
 
+def peak_rss_mb() -> float:
+    """현재 프로세스의 최대 RSS(MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 bytes 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# HLS 세그먼트 길이(초): 슬라이드 영상은 이 간격마다 키프레임을 강제해 -c copy 분할이 이 길이로 잘리도록 함
+HLS_SEGMENT_SEC = 4
+
+def keyframe_args(interval: int = HLS_SEGMENT_SEC) -> List[str]:
+    """interval초마다 키프레임을 강제하는 ffmpeg 인코딩 옵션 (기본 GOP 250프레임 = 25fps에서 10초)"""
+    return ["-force_key_frames", f"expr:gte(t,n_forced*{interval})"]
+
+def fit_frame_filter(width=1920, height=1080) -> str:
+    """이미지를 지정 해상도에 맞춰 축소하고 남는 영역을 검은색으로 채우는 -vf 필터"""
+    return (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black")
+
+def atempo_chain(speed: float) -> str:
+    """재생 속도를 ffmpeg atempo 필터 체인으로 변환 (1.0x면 빈 문자열)"""
+    speed = float(speed)
+    if speed == 1.0:
+        return ""
+    # ffmpeg atempo 필터는 한 번에 0.5x ~ 2.0x만 지원하므로 범위를 벗어나면 체인으로 연결
+    if 0.5 <= speed <= 2.0:
+        return f"atempo={speed}"
+    current_speed = speed
+    atempo_filters = []
+    while current_speed > 2.0:
+        atempo_filters.append("atempo=2.0")
+        current_speed /= 2.0
+    while current_speed < 0.5:
+        atempo_filters.append("atempo=0.5")
+        current_speed /= 0.5
+    if current_speed != 1.0:
+        atempo_filters.append(f"atempo={current_speed}")
+    return ",".join(atempo_filters)
+
 def render_mp4(image_path: str, audio_path: str, out_mp4: str,
                width=1920, height=1080):
     """배경 이미지와 오디오를 합쳐 MP4 영상 생성"""
@@ -62,8 +101,7 @@ def render_mp4(image_path: str, audio_path: str, out_mp4: str,
     if dur == 0:
         raise ValueError(f"오디오 파일 길이가 0입니다: {audio_path}")
         
-    vf = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
-          f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black")
+    vf = fit_frame_filter(width, height)
 
     # FFmpeg 명령
     cmd = ["ffmpeg", "-y",
@@ -72,19 +110,226 @@ def render_mp4(image_path: str, audio_path: str, out_mp4: str,
             "-t", str(dur),                   
             "-vf", vf,                        
             "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+            *keyframe_args(),                 # HLS 분할 지점
             "-c:a", "aac", "-b:a", "192k",
             "-pix_fmt", "yuv420p",
             "-movflags", "+faststart",        
             out_mp4]
     subprocess.check_call(cmd)
 
+def _collect_lines(stream, sink: List[str]):
+    """ffmpeg stderr를 줄 단위로 모아 파이프가 가득 차서 멈추는 것을 방지"""
+    for raw in iter(stream.readline, b""):
+        sink.append(raw.decode("utf-8", "replace").rstrip())
+    stream.close()
+
+# -progress pipe:2가 stderr에 섞어 쓰는 key=value 줄 (오류 메시지와 구분용)
+PROGRESS_LINE_RE = re.compile(r"^(frame|fps|stream_\d+_\d+_q|bitrate|total_size|out_time(_us|_ms)?"
+                              r"|dup_frames|drop_frames|speed|progress)=")
+
+def ffmpeg_errors(lines: List[str]) -> str:
+    """stderr 줄 중 -progress 출력을 제외한 오류 메시지"""
+    return "\n".join(l for l in lines if not PROGRESS_LINE_RE.match(l))
+
+def progress_duration(lines: List[str]) -> float:
+    """ffmpeg -progress 출력에서 마지막 out_time(초)을 추출"""
+    for line in reversed(lines):
+        key, _, value = line.partition("=")
+        if key in ("out_time_us", "out_time_ms") and value.strip().lstrip("-").isdigit():
+            return max(int(value) / 1_000_000, 0.0)
+    return 0.0
+
+# MPEG 오디오 Layer III 헤더 표 (비트레이트 kbps, 샘플레이트 Hz): [MPEG-1, MPEG-2/2.5]
+MP3_BITRATES = ([0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+                [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160])
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+class Mp3Duration:
+    """ffmpeg stdin으로 보내는 mp3 바이트의 프레임 헤더를 세어 재생 길이(초)를 계산 (ffprobe 호출 없음)
+
+    첫 프레임이 Xing/Info 태그이면 오디오로 세지 않고, LAME(또는 Lavf/Lavc) 태그의 encoder delay/padding은
+    ffmpeg의 gapless 처리와 같게 빼서 디코딩 결과 길이와 맞춘다.
+    """
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.skip = 0          # 다음 헤더까지 건너뛸 바이트 (프레임 본문 / ID3 태그)
+        self.samples = 0
+        self.sample_rate = 0
+        self.trim = 0          # LAME 태그 기준으로 빼야 할 샘플 수
+        self.first = True
+
+    def feed(self, chunk: bytes):
+        if self.skip >= len(chunk):
+            self.skip -= len(chunk)
+            return
+        self.buf += chunk[self.skip:]
+        self.skip = 0
+        buf, pos = self.buf, 0
+        while len(buf) - pos >= 4:
+            if self.first and buf[pos:pos+3] == b"ID3":
+                if len(buf) - pos < 10:
+                    break
+                size = (buf[pos+6] << 21) | (buf[pos+7] << 14) | (buf[pos+8] << 7) | buf[pos+9]
+                pos += 10 + size
+                continue
+            h = int.from_bytes(buf[pos:pos+4], "big")
+            version, layer = (h >> 19) & 3, (h >> 17) & 3
+            br_idx, sr_idx = (h >> 12) & 15, (h >> 10) & 3
+            if (h >> 21) != 0x7FF or version == 1 or layer != 1 or br_idx in (0, 15) or sr_idx == 3:
+                pos += 1 # 동기화가 깨진 바이트는 건너뜀
+                continue
+            mpeg1 = version == 3
+            sr = MP3_SAMPLE_RATES[version][sr_idx]
+            length = (144 if mpeg1 else 72) * MP3_BITRATES[0 if mpeg1 else 1][br_idx] * 1000 // sr + ((h >> 9) & 1)
+            if self.first:
+                # Xing/Info 태그 확인에 필요한 만큼 (첫 프레임 전체) 모일 때까지 대기
+                if len(buf) - pos < length:
+                    break
+                self.first = False
+                self.sample_rate = sr
+                if self._read_info_frame(bytes(buf[pos:pos+length]), mpeg1, (h >> 6) & 3 == 3):
+                    pos += length
+                    continue
+            self.samples += 1152 if mpeg1 else 576
+            pos += length
+        if pos > len(buf):
+            self.skip = pos - len(buf)
+            pos = len(buf)
+        del buf[:pos]
+
+    def _read_info_frame(self, frame: bytes, mpeg1: bool, mono: bool) -> bool:
+        """첫 프레임이 Xing/Info 태그 프레임인지 확인하고 LAME encoder delay/padding을 읽음"""
+        off = 4 + (17 if mono else 32) if mpeg1 else 4 + (9 if mono else 17)
+        if frame[off:off+4] not in (b"Xing", b"Info"):
+            return False
+        flags = int.from_bytes(frame[off+4:off+8], "big")
+        lame = off + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+        if frame[lame:lame+4] in (b"LAME", b"Lavf", b"Lavc") and len(frame) >= lame + 24:
+            v = int.from_bytes(frame[lame+21:lame+24], "big")
+            self.trim = (v >> 12) + (v & 0xFFF)
+        return True
+
+    @property
+    def seconds(self) -> float:
+        if not self.sample_rate:
+            return 0.0
+        return max(self.samples - self.trim, 0) / self.sample_rate
+
+def _stream_render_cmd(image_path: str, out_mp4: str, speed: float, width: int, height: int) -> List[str]:
+    """stdin(mp3)과 배경 이미지를 받아 속도 조절 + MP4 합성을 수행하는 ffmpeg 명령"""
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+           "-nostats", "-progress", "pipe:2",
+           "-loop", "1", "-i", image_path,
+           "-f", "mp3", "-i", "pipe:0",       # 오디오는 stdin으로 수신 (중간 파일 없음)
+           "-map", "0:v", "-map", "1:a",
+           "-vf", fit_frame_filter(width, height)]
+    filter_chain = atempo_chain(speed)
+    if filter_chain:
+        cmd += ["-af", filter_chain]
+    cmd += ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+            *keyframe_args(),                 # HLS 분할 지점
+            "-c:a", "aac", "-b:a", "192k",
+            "-pix_fmt", "yuv420p",
+            "-shortest",                      # 오디오가 끝나면 루프 이미지도 종료 (꼬리는 _trim_to_audio에서 정리)
+            out_mp4]
+    return cmd
+
+def _trim_to_audio(tmp_mp4: str, out_mp4: str, duration: float):
+    """-shortest 이후에도 남는 루프 이미지 영상 꼬리를 오디오 길이(duration, 초)에 맞춰 잘라 저장
+
+    오디오가 천천히 들어오는 동안 영상 인코더가 앞서 나가 슬라이드마다 영상이 오디오보다 수백 ms 길어질 수 있고,
+    concat 시 이 차이가 누적되어 음성이 화면보다 점점 앞서게 된다. 재인코딩 없이 복사하며 +faststart도 이 단계에서 적용한다.
+    원래 목표는 임시 파일 없이 한 번에 끝내는 것이었지만, 인코딩 중에는 오디오 끝을 알 수 없어 -t를 미리 줄 수 없으므로
+    임시 파일(<out>.part.mp4)과 이 복사 단계는 의도적으로 남겨 둔다 (길이는 ffprobe 대신 Mp3Duration으로 계산).
+    """
+    if duration <= 0:
+        os.remove(tmp_mp4)
+        raise ValueError(f"오디오 길이가 0입니다: {out_mp4}")
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+           "-i", tmp_mp4, "-map", "0", "-c", "copy",
+           "-t", f"{duration:.3f}",
+           "-movflags", "+faststart",
+           out_mp4]
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    os.remove(tmp_mp4)
+    if res.returncode != 0:
+        raise RuntimeError(f"FFmpeg 길이 보정 실패: {out_mp4}, {res.stderr[-2000:]}")
+
+def render_mp4s_from_stream(image_path: str, audio_chunks: Iterable[bytes], outputs: List[dict],
+                            deadline: Optional[float] = None) -> List[Union[float, Exception]]:
+    """하나의 TTS mp3 스트림을 여러 ffmpeg 프로세스에 동시에 나눠 흘려 (speed/해상도별) MP4를 생성
+
+    outputs: [{"out_mp4": str, "speed": float, "width": int, "height": int}, ...]
+    deadline: time.monotonic() 기준 스트림 수신 마감 시각. 넘기면 TimeoutError (조금씩 흘러드는 스트림 방지)
+    반환: outputs 순서대로 영상 길이(초) 또는 해당 출력만 실패한 경우의 예외.
+    TTS 스트림 자체가 끊기면 모든 출력이 무효이므로 예외를 그대로 올린다.
+    """
+    procs, logs, readers = [], [], []
+    parts = [o["out_mp4"] + ".part.mp4" for o in outputs] # 길이 보정 전 임시 파일
+    for o, part in zip(outputs, parts):
+        cmd = _stream_render_cmd(image_path, part, float(o.get("speed", 1.0)),
+                                 int(o.get("width", 1920)), int(o.get("height", 1080)))
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        log: List[str] = []
+        reader = threading.Thread(target=_collect_lines, args=(proc.stderr, log), daemon=True)
+        reader.start()
+        procs.append(proc); logs.append(log); readers.append(reader)
+
+    alive = list(procs)
+    mp3 = Mp3Duration() # 흘려보내는 바이트에서 원본 오디오 길이 계산
+    try:
+        for chunk in audio_chunks:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"TTS 스트림 수신 제한 시간 초과: {outputs[0]['out_mp4']}")
+            if not chunk:
+                continue
+            mp3.feed(chunk)
+            for proc in list(alive):
+                try:
+                    proc.stdin.write(chunk)
+                except BrokenPipeError:
+                    alive.remove(proc) # 먼저 종료된 ffmpeg: 아래 returncode로 판단
+    except Exception:
+        # TTS 스트림 중단 시 잘린 영상이 남지 않도록 ffmpeg를 강제 종료
+        for proc, reader, part in zip(procs, readers, parts):
+            proc.kill()
+            proc.wait()
+            reader.join()
+            if os.path.exists(part):
+                os.remove(part)
+        raise
+    finally:
+        for proc in procs:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    # 한 출력이 실패해도 나머지 ffmpeg는 끝까지 기다려 출력별 결과를 모음
+    results: List[Union[float, Exception]] = []
+    for proc, reader, log, o, part in zip(procs, readers, logs, outputs, parts):
+        returncode = proc.wait()
+        reader.join()
+        try:
+            if returncode != 0:
+                raise RuntimeError(f"FFmpeg 스트리밍 합성 실패: {o['out_mp4']}, {ffmpeg_errors(log)[-2000:]}")
+            duration = mp3.seconds / float(o.get("speed", 1.0)) or progress_duration(log)
+            _trim_to_audio(part, o["out_mp4"], duration)
+            results.append(duration)
+        except Exception as e:
+            if os.path.exists(part):
+                os.remove(part)
+            results.append(e)
+    return results
+
 def concat_videos_ffmpeg(video_paths: List[str], out_path: str, reencode: bool=False):
     """여러 MP4 파일을 하나의 영상으로 병합"""
     list_path = out_path + ".txt"
     with open(list_path, "w", encoding="utf-8") as f:
         for v in video_paths:
             # 절대 경로 사용
-            f.write(f"file '{os.path.abspath(v)}'\\n") 
+            f.write(f"file '{os.path.abspath(v)}'\n")
     if reencode:
         cmd = [
             "ffmpeg","-y","-safe","0","-f","concat","-i",list_path,
@@ -98,6 +343,97 @@ def concat_videos_ffmpeg(video_paths: List[str], out_path: str, reencode: bool=F
         cmd = ["ffmpeg","-y","-safe","0","-f","concat","-i",list_path,"-c","copy",out_path]
     subprocess.check_call(cmd)
 
+# ===============================
+# 🔹 HLS(점진적 재생) 유틸리티
+# ===============================
+
+HLS_HEADER_TAGS = ("#EXTM3U", "#EXT-X-VERSION", "#EXT-X-PLAYLIST-TYPE", "#EXT-X-TARGETDURATION",
+                   "#EXT-X-MEDIA-SEQUENCE", "#EXT-X-ENDLIST", "#EXT-X-INDEPENDENT-SEGMENTS")
+
+def _read_hls_body(playlist_path: str) -> List[str]:
+    """재생목록에서 헤더/종료 태그를 제외한 세그먼트 목록 부분만 읽기"""
+    if not os.path.exists(playlist_path):
+        return []
+    with open(playlist_path, "r", encoding="utf-8") as f:
+        lines = [l.strip() for l in f]
+    return [l for l in lines if l and not l.startswith(HLS_HEADER_TAGS)]
+
+def _read_hls_target(playlist_path: str) -> Optional[int]:
+    """기존 재생목록의 #EXT-X-TARGETDURATION 값 (없으면 None)"""
+    if not os.path.exists(playlist_path):
+        return None
+    with open(playlist_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#EXT-X-TARGETDURATION:"):
+                return int(line.split(":", 1)[1])
+    return None
+
+def _write_hls_playlist(playlist_path: str, body: List[str], ended: bool, target: int):
+    """EVENT 재생목록을 임시 파일에 쓴 뒤 교체 (재생 중인 플레이어가 반쯤 쓰인 파일을 읽지 않도록)
+
+    target(#EXT-X-TARGETDURATION)은 재생목록을 처음 만들 때 정한 값을 끝까지 유지해야 한다 (RFC 8216 6.2.1).
+    """
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-PLAYLIST-TYPE:EVENT",
+             f"#EXT-X-TARGETDURATION:{target}", "#EXT-X-MEDIA-SEQUENCE:0", *body]
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    tmp_path = playlist_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, playlist_path)
+
+def append_hls_segments(video_path: str, playlist_path: str, segment_prefix: str,
+                        hls_time: int = HLS_SEGMENT_SEC) -> List[str]:
+    """완성된 슬라이드 MP4를 재인코딩 없이 HLS 세그먼트(.ts)로 잘라 라이브 재생목록 끝에 추가
+
+    -c copy는 키프레임에서만 자를 수 있으므로 영상은 render_mp4/_stream_render_cmd처럼
+    hls_time 간격으로 키프레임이 강제되어 있어야 세그먼트가 hls_time 이하로 유지된다.
+    """
+    hls_dir = os.path.dirname(os.path.abspath(playlist_path))
+    os.makedirs(hls_dir, exist_ok=True)
+    part_playlist = os.path.join(hls_dir, f"{segment_prefix}.m3u8")
+
+    cmd = ["ffmpeg", "-y", "-i", video_path,
+           "-c", "copy", "-f", "hls",
+           "-hls_time", str(hls_time),
+           "-hls_playlist_type", "vod",
+           "-hls_segment_filename", os.path.join(hls_dir, f"{segment_prefix}_%03d.ts"),
+           part_playlist]
+    res = subprocess.run(cmd, capture_output=True, text=True)
+    if res.returncode != 0:
+        raise RuntimeError(f"HLS 세그먼트 생성 실패: {video_path}, {res.stderr[-2000:]}")
+
+    # 슬라이드 재생목록의 세그먼트를 전체 재생목록으로 옮김
+    new_body, segments, durations = [], [], []
+    with open(part_playlist, "r", encoding="utf-8") as f:
+        for line in (l.strip() for l in f):
+            if line.startswith("#EXTINF:"):
+                new_body.append(line)
+                durations.append(float(line[len("#EXTINF:"):].split(",")[0]))
+            elif line and not line.startswith("#"):
+                new_body.append(line)
+                segments.append(os.path.join(hls_dir, line))
+    os.remove(part_playlist)
+
+    target = _read_hls_target(playlist_path) or hls_time
+    longest = max(durations, default=0.0)
+    if round(longest) > target:
+        # 키프레임 간격이 맞지 않는 영상: 목표 길이를 바꾸면 재생 중인 플레이어가 깨지므로 경고만 남김
+        print(f"[HLS 경고] {video_path} 세그먼트 {longest:.2f}s가 TARGETDURATION {target}s를 넘습니다.")
+
+    body = _read_hls_body(playlist_path)
+    if body:
+        body.append("#EXT-X-DISCONTINUITY") # 슬라이드마다 타임스탬프가 0부터 시작
+    _write_hls_playlist(playlist_path, body + new_body, ended=False, target=target)
+    return segments
+
+def finalize_hls_playlist(playlist_path: str):
+    """마지막 슬라이드까지 추가된 재생목록에 종료 태그(#EXT-X-ENDLIST)를 기록"""
+    if not os.path.exists(playlist_path):
+        return
+    _write_hls_playlist(playlist_path, _read_hls_body(playlist_path), ended=True,
+                        target=_read_hls_target(playlist_path) or HLS_SEGMENT_SEC)
+
 def export_slide_as_png(state: dict, dpi: int = 220) -> dict:
     """PPTX 슬라이드를 PNG 이미지로 변환 (PDF 중간 변환 방식)"""
     work_dir = Path(state["work_dir"]).expanduser().resolve()
@@ -117,14 +453,22 @@ def export_slide_as_png(state: dict, dpi: int = 220) -> dict:
     # --- 1️⃣ PPT → PDF (한 번만 변환) ---
     pdf_path = work_dir / f"{pptx.stem}.pdf"
     if not pdf_path.exists():
-        lo_cmd = ["soffice","--headless","-env:UserInstallation=file:///tmp/lo_profile","--convert-to","pdf:impress_pdf_Export","--outdir", str(work_dir), str(pptx)]
-        res_pdf = subprocess.run(lo_cmd, capture_output=True, text=True, env=env)
-        if res_pdf.returncode != 0:
-            raise RuntimeError(f"PPTX → PDF 변환 실패: {res_pdf.stderr}")
+        pool = get_office_pool()
+        if pool is not None:
+            # 상주 LibreOffice 워커에 UNO 소켓으로 변환 요청 (기동 비용 없음)
+            pool.convert_to_pdf(pptx, work_dir)
+        else:
+            # 풀이 없으면 cold 실행: 스레드마다 별도 프로필을 써서 동시 업로드 시 프로필 lock 충돌 방지
+            profile_dir = Path(tempfile.gettempdir()) / f"lo_profile_{os.getpid()}_{threading.get_ident()}"
+            lo_cmd = ["soffice","--headless",f"-env:UserInstallation={profile_dir.as_uri()}","--convert-to","pdf:impress_pdf_Export","--outdir", str(work_dir), str(pptx)]
+            res_pdf = subprocess.run(lo_cmd, capture_output=True, text=True, env=env)
+            if res_pdf.returncode != 0:
+                raise RuntimeError(f"PPTX → PDF 변환 실패: {res_pdf.stderr}")
 
     # --- 2️⃣ PDF → PNG (슬라이드별 추출) ---
+    # -singlefile: 페이지 수에 따라 번호가 0으로 채워지는(slide_img-01.png) 이름 대신 고정 이름 사용
     png_path = Path(f"{out_prefix}-{page_no}.png")
-    ppm_cmd = ["pdftoppm", "-f", str(page_no), "-l", str(page_no), "-png", "-r", str(dpi), str(pdf_path), str(out_prefix)]
+    ppm_cmd = ["pdftoppm", "-f", str(page_no), "-l", str(page_no), "-singlefile", "-png", "-r", str(dpi), str(pdf_path), f"{out_prefix}-{page_no}"]
     res2 = subprocess.run(ppm_cmd, capture_output=True, text=True, env=env)
     if res2.returncode != 0:
         print(f"[경고] pdftoppm 변환 실패: {res2.stderr}")
@@ -132,9 +476,9 @@ def export_slide_as_png(state: dict, dpi: int = 220) -> dict:
     if not png_path.exists():
         raise FileNotFoundError(f"슬라이드 {page_no} PNG 변환 실패: {png_path}")
 
-    # --- 3️⃣ 변환 후 PDF 삭제 (선택적) ---
+    # --- 3️⃣ 변환 후 PDF 삭제 (keep_pdf면 다음 슬라이드를 위해 유지) ---
     try:
-        if pdf_path.exists():
+        if not state.get("keep_pdf", False) and pdf_path.exists():
             os.remove(pdf_path)
     except Exception as e:
         print(f"[경고] PDF 삭제 실패: {e}")